@@ -1,9 +1,14 @@
 """
 System Check Script - Verify Chatterbox Story Narrator Setup
 Run this script to verify everything is working correctly
+
+Usage:
+    python check_setup.py          # fast checks (package metadata, config, files)
+    python check_setup.py --deep   # also run the functionality test (loads the full stack)
 """
 import sys
 import os
+import subprocess
 from pathlib import Path
 import logging
 
@@ -15,8 +20,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Project paths
+ROOT = Path(__file__).resolve().parent
+SRC_DIR = ROOT / "src"
+
 # Add src to path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(SRC_DIR))
 
 def print_header(text):
     """Print a formatted header"""
@@ -55,7 +64,7 @@ def check_virtual_env():
 
 def check_env_file():
     """Check if .env file exists and has required keys"""
-    env_path = Path(__file__).parent / ".env"
+    env_path = ROOT / ".env"
     exists = env_path.exists()
 
     if exists:
@@ -81,31 +90,34 @@ def check_env_file():
         return False
 
 def check_dependencies():
-    """Check if required packages are installed"""
+    """Check if required packages are installed (reads metadata, does not import them)"""
+    from importlib.metadata import distribution, PackageNotFoundError
+
+    # import name -> (PyPI distribution name, display name)
     required_packages = {
-        'torch': 'PyTorch',
-        'torchaudio': 'TorchAudio',
-        'transformers': 'Transformers',
-        'librosa': 'Librosa',
-        'gradio': 'Gradio',
-        'google.generativeai': 'Google Generative AI',
-        'dotenv': 'Python Dotenv',
-        'runpod': 'RunPod',
+        'torch': ('torch', 'PyTorch'),
+        'torchaudio': ('torchaudio', 'TorchAudio'),
+        'transformers': ('transformers', 'Transformers'),
+        'librosa': ('librosa', 'Librosa'),
+        'gradio': ('gradio', 'Gradio'),
+        'google.generativeai': ('google-generativeai', 'Google Generative AI'),
+        'dotenv': ('python-dotenv', 'Python Dotenv'),
+        'runpod': ('runpod', 'RunPod'),
     }
 
     all_installed = True
-    for package, name in required_packages.items():
+    for package, (dist_name, name) in required_packages.items():
         try:
-            __import__(package)
+            distribution(dist_name)
             print_check(f"  {name}", True)
-        except ImportError:
+        except PackageNotFoundError:
             print_check(f"  {name}", False, "REQUIRED - run: pip install -r requirements.txt")
             all_installed = False
 
     return all_installed
 
 def check_imports():
-    """Check if project modules can be imported"""
+    """Check if project modules can be imported (single subprocess, with import timings)"""
     modules = {
         'chatterbox.tts': 'Chatterbox TTS',
         'story_narrator': 'Story Narrator',
@@ -114,13 +126,53 @@ def check_imports():
         'story_narrator.story_generator': 'Story Generator',
     }
 
+    # Import every module in one interpreter so shared dependencies load once
+    probe = (
+        "import sys\n"
+        "for m in sys.argv[1:]:\n"
+        "    try:\n"
+        "        __import__(m)\n"
+        "        print('OK', m)\n"
+        "    except Exception as e:\n"
+        "        print('FAIL', m, str(e)[:50].replace('\\n', ' '))\n"
+    )
+    src_dir = str(SRC_DIR)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (src_dir, env.get("PYTHONPATH")) if p)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe, *modules],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+
+    # -X importtime writes "import time: self [us] | cumulative | package" lines to stderr
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            parts = line.split("|")
+            try:
+                import_times[parts[2].strip()] = int(parts[1]) / 1000
+            except ValueError:
+                continue
+
+    errors = {}
+    loaded = set()
+    for line in result.stdout.splitlines():
+        status, _, rest = line.partition(" ")
+        module, _, error = rest.partition(" ")
+        if status == "OK":
+            loaded.add(module)
+        elif status == "FAIL":
+            errors[module] = error
+
     all_imported = True
     for module, name in modules.items():
-        try:
-            __import__(module)
-            print_check(f"  {name}", True)
-        except Exception as e:
-            print_check(f"  {name}", False, f"Error: {str(e)[:50]}")
+        if module in loaded:
+            ms = import_times.get(module)
+            print_check(f"  {name}", True, f"Imported in {ms:.0f} ms" if ms is not None else "")
+        else:
+            print_check(f"  {name}", False, f"Error: {errors.get(module, 'import probe did not run')}")
             all_imported = False
 
     return all_imported
@@ -145,7 +197,7 @@ def check_gpu():
 
 def check_sample_files():
     """Check if sample audio files exist"""
-    samples_dir = Path(__file__).parent / "samples"
+    samples_dir = ROOT / "samples"
 
     if not samples_dir.exists():
         print_check("Samples Directory", False, "samples/ directory not found")
@@ -164,7 +216,7 @@ def check_sample_files():
 
 def check_output_directory():
     """Check/create output directory"""
-    output_dir = Path(__file__).parent / "src" / "output"
+    output_dir = SRC_DIR / "output"
 
     if not output_dir.exists():
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -195,6 +247,7 @@ def run_quick_test():
 
 def main():
     """Main check function"""
+    deep = "--deep" in sys.argv
     print_header("CHATTERBOX STORY NARRATOR - SYSTEM CHECK")
 
     results = {}
@@ -222,9 +275,10 @@ def main():
     results['samples'] = check_sample_files()
     results['output'] = check_output_directory()
 
-    # Quick test
-    print_header("6. Functionality Test")
-    results['test'] = run_quick_test()
+    # Quick test (imports the full story_narrator stack, so only with --deep)
+    if deep:
+        print_header("6. Functionality Test")
+        results['test'] = run_quick_test()
 
     # Summary
     print_header("SUMMARY")
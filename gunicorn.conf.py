@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for the VoiceClone FastAPI backend
+
+Usage:
+    gunicorn src.api.main:app -c gunicorn.conf.py
+"""
+import multiprocessing
+import os
+
+# Uvicorn workers: one event loop per process, so CPU work (bcrypt, JWT, validation) uses every core
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * multiprocessing.cpu_count() + 1))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Build the app once before forking so workers share its memory copy-on-write
+preload_app = True
+
+# Heartbeat files in RAM instead of on (possibly slow) disk
+worker_tmp_dir = "/dev/shm"
+
+# Model loading / first RunPod request can take a while
+timeout = int(os.getenv("REQUEST_TIMEOUT_SECONDS", "600"))
+
+# No per-request access log from the workers (the platform proxy already records requests)
+accesslog = None
+
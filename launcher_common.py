@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Shared helpers for the run_api.py / run_app.py launchers
+"""
+import os
+import sys
+from pathlib import Path
+import logging
+
+logger = logging.getLogger("launcher")
+
+ROOT = Path(__file__).resolve().parent
+
+
+def configure_logging():
+    """Configure simple message-only logging for the launchers"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+
+def fix_windows_encoding():
+    """Fix Windows console encoding for emojis"""
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding='utf-8')
+        sys.stderr.reconfigure(encoding='utf-8')
+
+
+def add_src_to_path(root: Path = ROOT):
+    """Make the src/ packages importable"""
+    sys.path.insert(0, str(root / "src"))
+
+
+def check_env(root: Path = ROOT) -> bool:
+    """Check if environment is set up correctly"""
+    env_file = root / ".env"
+    if not env_file.exists():
+        logger.warning("WARNING: .env file not found!")
+        logger.info("Creating from .env.example...")
+
+        example_file = root / ".env.example"
+        if example_file.exists():
+            import shutil
+            shutil.copy(example_file, env_file)
+            logger.info("[OK] Created .env file")
+            logger.info("IMPORTANT: Edit .env and add your GOOGLE_API_KEY!")
+            logger.info(f"File location: {env_file}")
+            return False
+
+    # Load environment once; the sentinel is inherited by uvicorn and its reload workers
+    if not os.environ.get("_DOTENV_LOADED"):
+        from dotenv import load_dotenv
+        load_dotenv()
+        os.environ["_DOTENV_LOADED"] = "1"
+
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key or api_key == "your_google_api_key_here":
+        logger.error("ERROR: GOOGLE_API_KEY not set in .env file!")
+        logger.info(f"Please edit: {env_file}")
+        logger.info("Get your API key from: https://makersuite.google.com/app/apikey")
+        return False
+
+    logger.info("[OK] Environment check passed!")
+    return True
+
+
+def serve(app: str, port: int, root: Path = ROOT):
+    """
+    Replace the launcher process with uvicorn serving `app`
+
+    Nothing from the launcher is carried into the server; the environment
+    loaded from .env is inherited.
+    """
+    sys.stdout.flush()
+    os.execv(sys.executable, [
+        sys.executable, "-m", "uvicorn", app,
+        "--app-dir", str(root / "src"),
+        "--host", "0.0.0.0",
+        "--port", str(port),
+        "--reload",
+        "--ws", "none",
+        "--log-level", "info",
+    ])
+
+
+def run(main):
+    """Run a launcher main() with the shared interrupt/error handling"""
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.info("\n\nShutting down...")
+    except Exception as e:
+        logger.error(f"\nError: {e}")
+        import traceback
+        traceback.print_exc()
@@ -3,57 +3,12 @@
 """
 Simple launcher for the Story Narrator web interface
 """
-import os
-import sys
-from pathlib import Path
-import logging
+from launcher_common import logger, configure_logging, fix_windows_encoding, add_src_to_path, check_env, run
 
-# Configure simple logging for launcher
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
-logger = logging.getLogger(__name__)
+configure_logging()
+fix_windows_encoding()
+add_src_to_path()
 
-# Fix Windows console encoding for emojis
-if sys.platform == "win32":
-    sys.stdout.reconfigure(encoding='utf-8')
-    sys.stderr.reconfigure(encoding='utf-8')
-
-# Add src to path
-ROOT = Path(__file__).parent
-sys.path.insert(0, str(ROOT / "src"))
-
-def check_env():
-    """Check if environment is set up correctly"""
-    env_file = ROOT / ".env"
-    if not env_file.exists():
-        logger.warning("WARNING: .env file not found!")
-        logger.info("Creating from .env.example...")
-
-        example_file = ROOT / ".env.example"
-        if example_file.exists():
-            import shutil
-            shutil.copy(example_file, env_file)
-            logger.info("[OK] Created .env file")
-            logger.info("IMPORTANT: Edit .env and add your GOOGLE_API_KEY!")
-            logger.info(f"File location: {env_file}")
-            return False
-
-    # Check if API key is set
-    from dotenv import load_dotenv
-    load_dotenv()
-
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key or api_key == "your_google_api_key_here":
-        logger.error("ERROR: GOOGLE_API_KEY not set in .env file!")
-        logger.info(f"Please edit: {env_file}")
-        logger.info("Get your API key from: https://makersuite.google.com/app/apikey")
-        return False
-
-    logger.info("[OK] Environment check passed!")
-    return True
 
 def main():
     logger.info("=" * 60)
@@ -83,12 +38,6 @@ def main():
         show_error=True
     )
 
+
 if __name__ == "__main__":
-    try:
-        main()
-    except KeyboardInterrupt:
-        logger.info("\n\nShutting down...")
-    except Exception as e:
-        logger.error(f"\nError: {e}")
-        import traceback
-        traceback.print_exc()
+    run(main)
@@ -2,137 +2,348 @@
 VoiceClone FastAPI Backend
 Main application entry point
 """
-from dotenv import load_dotenv
+import os
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (skipped when a launcher or reload parent already did)
+if not os.environ.get("_DOTENV_LOADED"):
+    from dotenv import load_dotenv
+    load_dotenv()
+    os.environ["_DOTENV_LOADED"] = "1"
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+from dataclasses import dataclass
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+import atexit
+import importlib
 import logging
-import os
+import queue
+import re
+import threading
+import time
 from datetime import datetime
 
-from .routes import story, tts, voice, stories, auth
+from ..auth.security import get_dummy_password_hash, shutdown_password_pool
 from ..database.connection import init_db
 from ..database.init_default_voice import init_default_voice
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+# Configure logging: request handlers only enqueue records; a listener thread
+# formats and writes them, so stderr writes never block the event loop
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_queue_handler = QueueHandler(queue.SimpleQueue())
+_log_listener = None
+
+
+def _start_log_listener():
+    """
+    Give this process a fresh log queue and listener thread
+
+    Threads don't survive fork, so a Gunicorn worker forked from the preloading
+    master calls this again; otherwise its records would queue up unread.
+    """
+    global _log_listener
+    _log_queue_handler.queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_queue_handler.queue, _log_handler)
+    _log_listener.start()
+
 
-# Create FastAPI app
-app = FastAPI(
-    title="VoiceClone API",
-    description="AI-powered story generation and narration with voice cloning",
-    version="1.0.0",
-)
+def _stop_log_listener():
+    """
+    Flush queued records, stop this process's listener thread and log directly from then on
 
-# Configure CORS - support both local development and production
-frontend_url = os.getenv("FRONTEND_URL", "").strip()
-environment = os.getenv("ENVIRONMENT", "development")
+    Runs from the app's shutdown event: Gunicorn workers leave through os._exit, so the
+    atexit hook only covers processes that exit normally (e.g. a plain uvicorn run).
+    """
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+        logging.root.removeHandler(_log_queue_handler)
+        logging.root.addHandler(_log_handler)
+
+
+_start_log_listener()
+os.register_at_fork(after_in_child=_start_log_listener)
+atexit.register(_stop_log_listener)
+logging.basicConfig(level=logging.INFO, handlers=[_log_queue_handler])
+logger = logging.getLogger(__name__)
 
 # Development origins
-allowed_origins = [
+DEV_ORIGINS = frozenset({
     "http://localhost:3000",  # Next.js dev server
     "http://127.0.0.1:3000",
     "http://localhost:8000",
     "http://127.0.0.1:8000",
-]
-
-# Add production frontend URL if set
-if frontend_url:
-    # Handle both with and without protocol
-    if not frontend_url.startswith(('http://', 'https://')):
-        allowed_origins.extend([
-            f"https://{frontend_url}",
-            f"http://{frontend_url}",
-        ])
+})
+
+# Matches FRONTEND_URL values that already carry a protocol
+_PROTOCOL_RE = re.compile(r"^https?://")
+
+# Cached ISO timestamp for /health, refreshed at most once per second: [iso, monotonic]
+_ts_cache = ["", 0.0]
+
+# Set once the default voice is cached (or immediately when TTS runs on RunPod)
+_voice_ready = threading.Event()
+
+# Static /ping payload (no per-request allocation)
+_PONG = {"pong": True}
+
+# Generated audio / voice samples, served under /output (relative to the working directory,
+# like the writers in routes/tts.py and database/voice_service.py)
+OUTPUT_DIR = Path("src/output")
+
+# /output files are named by task/voice ID and never rewritten, so browsers may cache them for good
+AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Read size for /output file responses (Starlette default is 64KB); audio files run to tens of MB
+AUDIO_CHUNK_SIZE = 1024 * 1024
+
+# Worker threads available to run_in_threadpool (blocking DB calls, password hashing)
+THREADPOOL_SIZE = 200
+
+# Route modules registered on the app, in include order. All are included by create_app(),
+# so the full API exists without running lifespan; the heavy SDKs they use (Gemini, torch)
+# are imported on first use or by each worker's startup event, never at module import.
+ROUTE_MODULES = ("auth", "stories", "story", "tts", "voice")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Environment-derived app settings, parsed once per process"""
+    frontend_url: str
+    environment: str
+    use_runpod: bool
+    allowed_origins: frozenset
+
+
+def build_allowed_origins(frontend_url: str, environment: str) -> frozenset:
+    """Build the CORS origin set - support both local development and production"""
+    if environment == "production":
+        return frozenset({"*"})
+    if not frontend_url:
+        return DEV_ORIGINS
+
+    # Add production frontend URL - handle both with and without protocol
+    if _PROTOCOL_RE.match(frontend_url):
+        extra = {frontend_url}
     else:
-        allowed_origins.append(frontend_url)
+        extra = {f"https://{frontend_url}", f"http://{frontend_url}"}
     logger.info(f"Added production frontend URL to CORS: {frontend_url}")
+    return DEV_ORIGINS | extra
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Parse environment settings once and reuse them across create_app() calls"""
+    frontend_url = os.getenv("FRONTEND_URL", "").strip()
+    environment = os.getenv("ENVIRONMENT", "development")
+    return Settings(
+        frontend_url=frontend_url,
+        environment=environment,
+        use_runpod=os.getenv("USE_RUNPOD", "false").lower() in ("true", "1", "yes"),
+        allowed_origins=build_allowed_origins(frontend_url, environment),
+    )
+
+
+class PreflightCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware answering successful preflights with an empty 204 instead of a 200 "OK" body"""
+
+    def preflight_response(self, request_headers):
+        response = super().preflight_response(request_headers)
+        if response.status_code != 200:
+            return response
+        headers = {
+            key: value for key, value in response.headers.items()
+            if key not in ("content-length", "content-type")
+        }
+        return Response(status_code=204, headers=headers)
+
+
+class APIGZipMiddleware(GZipMiddleware):
+    """
+    GZip middleware that leaves the /output audio files alone (already dense, and range-requested)
+    and the */stream endpoints (compression would buffer their server-sent events)
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and (scope["path"].startswith("/output") or scope["path"].endswith("/stream")):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 
-# For production, also allow all .onrender.com domains
-if environment == "production":
-    logger.info("Production mode: allowing .onrender.com origins")
+class AudioStaticFiles(StaticFiles):
+    """
+    StaticFiles for the /output audio files, read in larger chunks and cached long-term
+
+    FileResponse already hands the path to the server when it supports the
+    ASGI pathsend extension (zero-copy); otherwise fewer, larger reads cut the
+    per-chunk await/send overhead on multi-MB WAV downloads. ETag and
+    Last-Modified (from mtime and size) are set by FileResponse itself.
+    """
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        if isinstance(response, FileResponse):
+            response.chunk_size = AUDIO_CHUNK_SIZE
+        response.headers["Cache-Control"] = AUDIO_CACHE_CONTROL
+        return response
+
+
+def _now_iso() -> str:
+    """Return the current time as ISO string, recomputed at most once per second"""
+    t = time.monotonic()
+    if t - _ts_cache[1] > 1.0:
+        _ts_cache[:] = [datetime.now().isoformat(), t]
+    return _ts_cache[0]
+
+
+def include_routers(app: FastAPI, module_names) -> None:
+    """
+    Import the given route modules and include their routers
+
+    Each module is included at most once per app, so a repeated call
+    doesn't register routes twice.
+    """
+    included = app.state._route_modules = getattr(app.state, "_route_modules", set())
+    for module_name in module_names:
+        if module_name in included:
+            continue
+        module = importlib.import_module(f".routes.{module_name}", __package__)
+        app.include_router(module.router)
+        included.add(module_name)
+
+
+def create_app(settings: Settings = None) -> FastAPI:
+    """
+    Build the FastAPI application
+
+    Route modules are imported here rather than at module top so the
+    import cost is paid once, when the app is actually constructed.
+    """
+    settings = settings or get_settings()
+
+    app = FastAPI(
+        title="VoiceClone API",
+        description="AI-powered story generation and narration with voice cloning",
+        version="1.0.0",
+        default_response_class=ORJSONResponse,
+    )
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins if environment != "production" else ["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # Configure CORS - support both local development and production
+    if settings.environment == "production":
+        logger.info("Production mode: allowing .onrender.com origins")
+
+    app.add_middleware(
+        PreflightCORSMiddleware,
+        # Passed as the frozenset itself so the per-request origin check is a hash lookup
+        allow_origins=settings.allowed_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Let browsers cache preflight results for 24h instead of re-sending OPTIONS
+        max_age=86400,
+    )
+
+    # Compress larger JSON bodies (story text, voice library); level 1 keeps CPU cost low
+    app.add_middleware(APIGZipMiddleware, minimum_size=1000, compresslevel=1)
+
+    if settings.environment == "production":
+        logger.warning("CORS is set to allow all origins (*) in production. This should be restricted in a real deployment.")
 
-if environment == "production":
-    logger.warning("CORS is set to allow all origins (*) in production. This should be restricted in a real deployment.")
+    # Mount static files (for serving generated audio and voice samples)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-# Mount static files (for serving generated audio and voice samples)
-output_dir = Path("src/output")
-output_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        app.mount("/output", AudioStaticFiles(directory=str(OUTPUT_DIR)), name="output")
+    except Exception as e:
+        logger.warning(f"Could not mount output directory: {e}")
 
-try:
-    app.mount("/output", StaticFiles(directory=str(output_dir)), name="output")
-except Exception as e:
-    logger.warning(f"Could not mount output directory: {e}")
+    # Include routers
+    include_routers(app, ROUTE_MODULES)
 
-# Include routers
-app.include_router(auth.router)  # Authentication routes
-app.include_router(story.router)
-app.include_router(stories.router)  # Dashboard & story management
-app.include_router(tts.router)
-app.include_router(voice.router)
+    app.add_event_handler("startup", startup_event)
+    app.add_event_handler("shutdown", shutdown_password_pool)
+    app.add_event_handler("shutdown", _stop_log_listener)
+    app.add_api_route("/", root, methods=["GET"])
+    app.add_api_route("/health", health_check, methods=["GET"])
+    app.add_api_route("/ping", ping, methods=["GET"])
+
+    return app
+
+
+def _precache_default_voice():
+    """Pre-cache the default voice embeddings and flag readiness"""
+    try:
+        voice = init_default_voice()
+        if voice:
+            logger.info("✓ Default voice pre-cached successfully")
+            _voice_ready.set()
+        else:
+            logger.warning("! Default voice not initialized (will be cached on first use)")
+    except Exception as e:
+        logger.error(f"Failed to pre-cache default voice: {e}")
+        logger.warning("  TTS will still work, but first request will be slower")
 
 
-@app.on_event("startup")
 async def startup_event():
     """
     Application startup event handler
 
     Initializes:
     1. Database schema (creates tables if not exist)
-    2. Default voice pre-caching (only if not using RunPod - eliminates 400-1100ms overhead on first use)
+    2. Dummy password hash used for unknown-user logins
+    3. Story generator (Gemini client)
+    4. Default voice pre-caching in a background thread (only if not using RunPod -
+       eliminates 400-1100ms overhead on first use without delaying startup)
     """
     logger.info("=" * 60)
     logger.info("Application Startup")
     logger.info("=" * 60)
 
-    # Initialize database
+    # Raise the threadpool limit so blocking DB calls offloaded from async routes don't queue
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+    # Initialize database (once per worker, off the event loop; route modules no longer do this on import)
     logger.info("Initializing database...")
     try:
-        init_db()
+        await anyio.to_thread.run_sync(init_db)
         logger.info("✓ Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
 
-    # Pre-cache default voice (skip on Vercel/serverless platforms using RunPod)
-    use_runpod = os.getenv("USE_RUNPOD", "false").lower() in ("true", "1", "yes")
+    # Hash the dummy password now, so the first unknown-user login costs the same as any other
+    await get_dummy_password_hash()
 
-    if use_runpod:
+    # Create the story generator (imports and configures the Gemini SDK) before the first request
+    try:
+        from story_narrator.story_generator import get_story_generator
+        await anyio.to_thread.run_sync(get_story_generator)
+        logger.info("✓ Story generator ready")
+    except Exception as e:
+        logger.warning(f"Story generator not initialized at startup: {e}")
+
+    # Pre-cache default voice (skip on Vercel/serverless platforms using RunPod)
+    if get_settings().use_runpod:
         logger.info("Using RunPod for TTS - skipping local model initialization")
+        _voice_ready.set()
     else:
-        logger.info("Pre-caching default voice (this improves first TTS request by 10-20x)...")
-        try:
-            voice = init_default_voice()
-            if voice:
-                logger.info("✓ Default voice pre-cached successfully")
-            else:
-                logger.warning("! Default voice not initialized (will be cached on first use)")
-        except Exception as e:
-            logger.error(f"Failed to pre-cache default voice: {e}")
-            logger.warning("  TTS will still work, but first request will be slower")
+        # Run in the background so the app (and /health) is up while the voice loads
+        logger.info("Pre-caching default voice in background (this improves first TTS request by 10-20x)...")
+        threading.Thread(target=_precache_default_voice, daemon=True, name="voice-precache").start()
 
     logger.info("=" * 60)
     logger.info("Startup complete - Ready to accept requests")
     logger.info("=" * 60)
 
 
-@app.get("/")
 async def root():
     """Root endpoint"""
     return {
@@ -143,7 +354,6 @@ async def root():
     }
 
 
-@app.get("/health")
 async def health_check():
     """
     Health check endpoint
@@ -153,11 +363,11 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "voiceclone-api",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _now_iso(),
+        "voice_ready": _voice_ready.is_set()
     }
 
 
-@app.get("/ping")
 async def ping():
     """
     Lightweight keep-alive endpoint for Render inactivity prevention
@@ -165,7 +375,10 @@ async def ping():
     Frontend polls this every 30-40 seconds during long operations
     to prevent Render from shutting down due to inactivity.
     """
-    return {"pong": True}
+    return _PONG
+
+
+app = create_app()
 
 
 if __name__ == "__main__":
@@ -179,6 +392,11 @@ if __name__ == "__main__":
         "api.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        loop="uvloop",
+        http="httptools",
+        # No websocket routes; access logging is left to the proxy in front
+        ws="none",
+        access_log=False,
+        lifespan="on",
+        log_level="warning"
     )
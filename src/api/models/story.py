@@ -2,7 +2,7 @@
 Story API Models
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 
 
@@ -10,7 +10,7 @@ class StoryGenerateRequest(BaseModel):
     theme: str = Field(..., min_length=10, description="Story theme or prompt")
     style: str = Field(..., description="Story style (adventure, fantasy, mystery, etc.)")
     tone: str = Field(..., description="Story tone (dramatic, lighthearted, etc.)")
-    length: str = Field(..., description="Story length (short, medium, long)")
+    length: Literal["short", "medium", "long"] = Field(..., description="Story length (short, medium, long)")
     additionalDetails: Optional[str] = Field(None, description="Additional story details")
 
 
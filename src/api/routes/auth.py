@@ -3,7 +3,9 @@ Authentication API Routes
 """
 import logging
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response
 
 from ..models.auth import (
     RegisterRequest,
@@ -12,39 +14,65 @@ from ..models.auth import (
     RefreshTokenRequest,
     UserResponse,
     ChangePasswordRequest,
-    MessageResponse,
 )
 from ...auth.security import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
+    get_dummy_password_hash,
+    password_needs_rehash,
     create_access_token,
     create_refresh_token,
     decode_token,
-    validate_token_type,
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_DAYS,
 )
-from ...auth.dependencies import get_current_user
+from ...auth.dependencies import get_current_user, invalidate_cached_user
 from ...database.user_service import (
     create_user,
-    get_user_by_username,
-    get_user_by_email,
-    user_exists,
+    get_user_by_id,
+    get_user_by_username_or_email,
+    check_conflicts,
     update_last_login,
     update_user,
 )
 from ...database.refresh_token_service import (
     create_refresh_token as store_refresh_token,
-    is_token_valid,
     revoke_token,
     revoke_user_tokens,
+    rotate_token,
 )
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/v1/auth", tags=["authentication"])
+# Access token lifetime as reported in token responses
+_ACCESS_TOKEN_EXPIRE_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+router = APIRouter(
+    prefix="/api/v1/auth",
+    tags=["authentication"],
+    default_response_class=ORJSONResponse,
+)
+
+
+def _token_response(access_token: str, refresh_token: str, status_code: int = status.HTTP_200_OK) -> ORJSONResponse:
+    """
+    Build the token response body directly
+
+    The payload is produced here, so it is not run back through TokenResponse
+    validation; the model is only referenced for the OpenAPI schema.
+    """
+    return ORJSONResponse(
+        {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": _ACCESS_TOKEN_EXPIRE_SECONDS,
+        },
+        status_code=status_code,
+    )
 
 
-@router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/register", status_code=status.HTTP_201_CREATED, responses={201: {"model": TokenResponse}})
 async def register(request: RegisterRequest):
     """
     Register a new user
@@ -52,19 +80,19 @@ async def register(request: RegisterRequest):
     Returns:
         JWT access and refresh tokens
     """
-    logger.info(f"Registration attempt for username: {request.username}, email: {request.email}")
+    logger.debug("Registration attempt for username: %s, email: %s", request.username, request.email)
 
-    # Check if username already exists
-    if user_exists(username=request.username):
-        logger.warning(f"Registration failed - Username already exists: {request.username}")
+    # Check if username or email already exists (one query)
+    conflict = await run_in_threadpool(check_conflicts, request.username, request.email)
+    if conflict == "username":
+        logger.warning("Registration failed - Username already exists: %s", request.username)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already exists",
         )
 
-    # Check if email already exists
-    if user_exists(email=request.email):
-        logger.warning(f"Registration failed - Email already exists: {request.email}")
+    if conflict == "email":
+        logger.warning("Registration failed - Email already exists: %s", request.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
@@ -72,79 +100,68 @@ async def register(request: RegisterRequest):
 
     try:
         # Hash password
-        logger.debug(f"Hashing password for user: {request.username}")
-        password_hash = hash_password(request.password)
+        password_hash = await hash_password_async(request.password)
 
         # Create user
-        logger.debug(f"Creating user record for: {request.username}")
-        user = create_user(
+        user = await run_in_threadpool(
+            create_user,
             username=request.username,
             email=request.email,
             password_hash=password_hash,
         )
 
         if not user:
-            logger.error(f"Failed to create user in database: {request.username}")
+            logger.error("Failed to create user in database: %s", request.username)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create user",
             )
 
-        logger.info(f"User created successfully: {user.username} (id={user.id})")
+        logger.info("User created successfully: %s (id=%s)", user.username, user.id)
 
         # Create tokens
-        logger.debug(f"Generating tokens for user: {user.username}")
         token_data = {"sub": str(user.id), "username": user.username}
         access_token = create_access_token(token_data)
         refresh_token = create_refresh_token(token_data)
 
         # Store refresh token in database
-        logger.debug(f"Storing refresh token for user: {user.username}")
-        store_refresh_token(user.id, refresh_token)
-
-        logger.info(f"Registration completed successfully for user: {user.username}")
-        return TokenResponse(
-            access_token=access_token,
-            refresh_token=refresh_token,
-            token_type="bearer",
-            expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        )
+        await run_in_threadpool(store_refresh_token, user.id, refresh_token, REFRESH_TOKEN_EXPIRE_DAYS)
+
+        logger.debug("Registration completed successfully for user: %s", user.username)
+        return _token_response(access_token, refresh_token, status_code=status.HTTP_201_CREATED)
     except Exception as e:
-        logger.error(f"Registration error for {request.username}: {str(e)}", exc_info=True)
+        logger.error("Registration error for %s: %s", request.username, e, exc_info=True)
         raise
 
 
-@router.post("/login", response_model=TokenResponse)
-async def login(request: LoginRequest):
+@router.post("/login", responses={200: {"model": TokenResponse}})
+async def login(request: LoginRequest, background_tasks: BackgroundTasks):
     """
     Login with username/email and password
 
     Returns:
         JWT access and refresh tokens
     """
-    logger.info(f"Login attempt for: {request.username}")
+    logger.debug("Login attempt for: %s", request.username)
 
     try:
-        # Get user (try username first, then email)
-        logger.debug(f"Looking up user: {request.username}")
-        user = get_user_by_username(request.username)
-        if not user:
-            logger.debug(f"Username not found, trying email: {request.username}")
-            user = get_user_by_email(request.username)
+        # Get user by username or email (one query, username match preferred)
+        user = await run_in_threadpool(get_user_by_username_or_email, request.username)
 
         if not user:
-            logger.warning(f"Login failed - User not found: {request.username}")
+            # Spend the same hashing time as a wrong password so unknown users can't be told apart
+            await verify_password_async(request.password, await get_dummy_password_hash())
+            logger.warning("Login failed - User not found: %s", request.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
             )
 
-        logger.debug(f"User found: {user.username} (id={user.id})")
+        logger.debug("User found: %s (id=%s)", user.username, user.id)
 
         # Verify password
-        logger.debug(f"Verifying password for user: {user.username}")
-        if not verify_password(request.password, user.password_hash):
-            logger.warning(f"Login failed - Invalid password for user: {user.username}")
+        if not await verify_password_async(request.password, user.password_hash):
+            logger.warning("Login failed - Invalid password for user: %s", user.username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -152,46 +169,44 @@ async def login(request: LoginRequest):
 
         # Check if user is active
         if not user.is_active:
-            logger.warning(f"Login failed - Inactive user login attempt: {user.username}")
+            logger.warning("Login failed - Inactive user login attempt: %s", user.username)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="User account is inactive",
             )
 
-        # Update last login
-        logger.debug(f"Updating last login for user: {user.username}")
-        update_last_login(user.id)
+        # Upgrade legacy bcrypt hashes to Argon2id now that the plain password is known
+        new_password_hash = None
+        if password_needs_rehash(user.password_hash):
+            logger.debug("Rehashing password for user: %s", user.username)
+            new_password_hash = await hash_password_async(request.password)
+
+        # Update last login (and any upgraded hash) after the response is sent
+        background_tasks.add_task(update_last_login, user.id, password_hash=new_password_hash)
 
-        logger.info(f"User logged in successfully: {user.username} (id={user.id})")
+        logger.info("User logged in successfully: %s (id=%s)", user.username, user.id)
 
         # Create tokens
-        logger.debug(f"Generating tokens for user: {user.username}")
         token_data = {"sub": str(user.id), "username": user.username}
         access_token = create_access_token(token_data)
         refresh_token = create_refresh_token(token_data)
 
         # Store refresh token in database
-        logger.debug(f"Storing refresh token for user: {user.username}")
-        store_refresh_token(user.id, refresh_token)
-
-        logger.info(f"Login completed successfully for user: {user.username}")
-        return TokenResponse(
-            access_token=access_token,
-            refresh_token=refresh_token,
-            token_type="bearer",
-            expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        )
+        await run_in_threadpool(store_refresh_token, user.id, refresh_token, REFRESH_TOKEN_EXPIRE_DAYS)
+
+        logger.debug("Login completed successfully for user: %s", user.username)
+        return _token_response(access_token, refresh_token)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Login error for {request.username}: {str(e)}", exc_info=True)
+        logger.error("Login error for %s: %s", request.username, e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred during login",
         )
 
 
-@router.post("/refresh", response_model=TokenResponse)
+@router.post("/refresh", responses={200: {"model": TokenResponse}})
 async def refresh(request: RefreshTokenRequest):
     """
     Refresh access token using refresh token
@@ -201,14 +216,6 @@ async def refresh(request: RefreshTokenRequest):
     """
     logger.debug("Token refresh request received")
 
-    # Validate refresh token
-    if not is_token_valid(request.refresh_token):
-        logger.warning("Invalid or expired refresh token")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired refresh token",
-        )
-
     # Decode token
     payload = decode_token(request.refresh_token)
     if not payload:
@@ -218,39 +225,47 @@ async def refresh(request: RefreshTokenRequest):
             detail="Invalid refresh token",
         )
 
-    # Validate token type
-    if not validate_token_type(request.refresh_token, "refresh"):
-        logger.warning("Token type mismatch: expected refresh token")
+    # Validate token type on the decoded payload (signature and expiry were checked by decode_token)
+    if payload.get("type") != "refresh":
+        logger.warning("Token type mismatch: expected refresh token, got %s", payload.get('type'))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token type",
         )
 
+    # A validly signed token can still carry a missing or non-numeric subject
     user_id = payload.get("sub")
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        logger.warning("Refresh token has an invalid subject: %r", user_id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+        )
     username = payload.get("username")
 
-    # Revoke old refresh token
-    revoke_token(request.refresh_token)
-
     # Create new tokens
-    token_data = {"sub": user_id, "username": username}
+    token_data = {"sub": str(user_id), "username": username}
     access_token = create_access_token(token_data)
     new_refresh_token = create_refresh_token(token_data)
 
-    # Store new refresh token
-    store_refresh_token(int(user_id), new_refresh_token)
+    # Validate + revoke the old refresh token and store the new one in a single transaction
+    if not await run_in_threadpool(
+        rotate_token, request.refresh_token, user_id, new_refresh_token, REFRESH_TOKEN_EXPIRE_DAYS
+    ):
+        logger.warning("Invalid or expired refresh token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
 
-    logger.info(f"Token refreshed successfully for user: {username}")
+    logger.info("Token refreshed successfully for user: %s", username)
 
-    return TokenResponse(
-        access_token=access_token,
-        refresh_token=new_refresh_token,
-        token_type="bearer",
-        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-    )
+    return _token_response(access_token, new_refresh_token)
 
 
-@router.post("/logout", response_model=MessageResponse)
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
 async def logout(
     request: RefreshTokenRequest,
     user: dict = Depends(get_current_user),
@@ -262,21 +277,17 @@ async def logout(
         - Valid access token in Authorization header
         - Refresh token in request body
     """
-    logger.info(f"Logout request for user: {user['username']}")
+    logger.debug("Logout request for user: %s", user['username'])
 
-    # Revoke the refresh token
-    if revoke_token(request.refresh_token):
-        logger.info(f"User logged out successfully: {user['username']}")
-        return MessageResponse(message="Logged out successfully")
+    # Revoke the refresh token; logout is idempotent, so an already revoked/invalid token is still a 204
+    if await run_in_threadpool(revoke_token, request.refresh_token):
+        logger.info("User logged out successfully: %s", user['username'])
     else:
-        logger.warning(f"Failed to revoke token for user: {user['username']}")
-        return MessageResponse(
-            message="Logged out",
-            detail="Token was already revoked or invalid",
-        )
+        logger.warning("Token was already revoked or invalid for user: %s", user['username'])
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@router.post("/logout-all", response_model=MessageResponse)
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
 async def logout_all(user: dict = Depends(get_current_user)):
     """
     Logout from all devices by revoking all refresh tokens
@@ -284,15 +295,12 @@ async def logout_all(user: dict = Depends(get_current_user)):
     Requires:
         - Valid access token in Authorization header
     """
-    logger.info(f"Logout all request for user: {user['username']}")
+    logger.debug("Logout all request for user: %s", user['username'])
 
-    count = revoke_user_tokens(user["id"])
-    logger.info(f"Revoked {count} tokens for user: {user['username']}")
+    count = await run_in_threadpool(revoke_user_tokens, user["id"])
+    logger.info("Revoked %s tokens for user: %s", count, user['username'])
 
-    return MessageResponse(
-        message="Logged out from all devices",
-        detail=f"Revoked {count} refresh token(s)",
-    )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/me", response_model=UserResponse)
@@ -306,20 +314,13 @@ async def get_me(user: dict = Depends(get_current_user)):
     Returns:
         Current user profile
     """
-    logger.debug(f"Get user info request: {user['username']}")
-
-    return UserResponse(
-        id=user["id"],
-        username=user["username"],
-        email=user["email"],
-        is_active=user["is_active"],
-        is_verified=user["is_verified"],
-        created_at=user["created_at"],
-        last_login=user.get("last_login"),
-    )
+    logger.debug("Get user info request: %s", user['username'])
+
+    # Return the dict as-is; response_model validates and filters it in a single pass
+    return user
 
 
-@router.post("/change-password", response_model=MessageResponse)
+@router.post("/change-password", status_code=status.HTTP_204_NO_CONTENT)
 async def change_password(
     request: ChangePasswordRequest,
     user: dict = Depends(get_current_user),
@@ -333,14 +334,12 @@ async def change_password(
         - New password
 
     Returns:
-        Success message
+        204 No Content (all refresh tokens are revoked; login again on all devices)
     """
-    logger.info(f"Password change request for user: {user['username']}")
+    logger.debug("Password change request for user: %s", user['username'])
 
     # Get user with password hash
-    from ...database.user_service import get_user_by_id
-
-    full_user = get_user_by_id(user["id"])
+    full_user = await run_in_threadpool(get_user_by_id, user["id"])
     if not full_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -348,31 +347,29 @@ async def change_password(
         )
 
     # Verify current password
-    if not verify_password(request.current_password, full_user.password_hash):
-        logger.warning(f"Invalid current password for user: {user['username']}")
+    if not await verify_password_async(request.current_password, full_user.password_hash):
+        logger.warning("Invalid current password for user: %s", user['username'])
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
         )
 
     # Hash new password
-    new_password_hash = hash_password(request.new_password)
+    new_password_hash = await hash_password_async(request.new_password)
 
     # Update password
-    updated_user = update_user(user["id"], password_hash=new_password_hash)
+    updated_user = await run_in_threadpool(update_user, user["id"], password_hash=new_password_hash)
+    invalidate_cached_user(user["id"])
     if not updated_user:
-        logger.error(f"Failed to update password for user: {user['username']}")
+        logger.error("Failed to update password for user: %s", user['username'])
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update password",
         )
 
     # Revoke all existing refresh tokens (force re-login on all devices)
-    revoke_user_tokens(user["id"])
+    await run_in_threadpool(revoke_user_tokens, user["id"])
 
-    logger.info(f"Password changed successfully for user: {user['username']}")
+    logger.info("Password changed successfully for user: %s", user['username'])
 
-    return MessageResponse(
-        message="Password changed successfully",
-        detail="Please login again on all devices",
-    )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
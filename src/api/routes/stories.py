@@ -4,19 +4,47 @@ Stories API Routes - Dashboard & Story Management
 All endpoints require authentication to ensure users can only access their own stories.
 """
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 from pydantic import BaseModel, Field
 import logging
-import uuid
 
-from database.story_service import StoryService
-from database.connection import init_db
-from story_narrator.story_generator import StoryGenerator
+from ...database.story_service import StoryService
+from story_narrator.story_generator import SAFETY_SETTINGS, get_story_generator
 from ...auth.dependencies import get_current_user
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/stories", tags=["stories"])
 
+# Prompt for create-similar, built once; call with the original story's fields
+SIMILAR_PROMPT_TEMPLATE = """Create a new story similar to the original but with specific modifications.
+
+**Original Story Details:**
+- Theme: {theme}
+- Style: {style}
+- Tone: {tone}
+- Length: {length}
+
+**Original Story:**
+{text}
+
+**Requested Modifications:**
+{modification_prompt}
+
+**Instructions:**
+1. Create a NEW story (not just edit the original)
+2. Keep the same theme ({theme}), style ({style}), and tone ({tone})
+3. Apply the requested modifications
+4. Maintain similar length (~{word_count} words)
+5. Keep language simple and appropriate for children (10 years old)
+6. Use short sentences and common words
+7. Ensure the story is complete with beginning, middle, and end
+8. Return ONLY the new story text, nothing else
+
+**New Story:**""".format
+
+SIMILAR_SYSTEM_INSTRUCTION = "You are a professional story writer who creates variations of existing stories while maintaining quality and coherence."
+
 
 class CreateSimilarRequest(BaseModel):
     """Request model for creating similar story"""
@@ -31,13 +59,6 @@ class CreateSimilarResponse(BaseModel):
     original_story_id: str
     modifications_applied: str
 
-# Initialize database on startup
-try:
-    init_db()
-    logger.info("Database initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize database: {e}")
-
 
 @router.get("")
 async def list_stories(
@@ -45,6 +66,7 @@ async def list_stories(
     offset: int = Query(0, ge=0, description="Number of stories to skip"),
     sort_by: str = Query("created_at", description="Column to sort by"),
     order: str = Query("DESC", pattern="^(ASC|DESC)$", description="Sort order"),
+    after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor (created_at sort)"),
     user: dict = Depends(get_current_user)
 ):
     """
@@ -58,26 +80,24 @@ async def list_stories(
         - total: Total number of user's stories
         - limit: Stories per page
         - offset: Current offset
+        - next_cursor: Pass as `after` to fetch the next page (None on the last page)
     """
     try:
-        result = StoryService.list_stories(
+        result = await run_in_threadpool(
+            StoryService.list_stories,
             user_id=user["id"],
             limit=limit,
             offset=offset,
             sort_by=sort_by,
-            order=order
+            order=order,
+            after=after
         )
 
-        # Remove full text from list view (only send in detail view)
-        for story in result["stories"]:
-            # Keep preview, remove full text for performance
-            story["text_preview"] = story.pop("preview_text", "")
-            story.pop("text", None)  # Remove full text
-
+        # Stories come back without full text (only sent in detail view)
         return result
 
     except Exception as e:
-        logger.error(f"Failed to list stories: {e}")
+        logger.error("Failed to list stories: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to list stories: {str(e)}")
 
 
@@ -97,21 +117,18 @@ async def get_story(story_id: str, user: dict = Depends(get_current_user)):
         Full story object including text
     """
     try:
-        story = StoryService.get_story(story_id)
+        # Ownership is part of the query: another user's story is reported as not found
+        story = await run_in_threadpool(StoryService.get_story, story_id, user_id=user["id"])
 
         if not story:
             raise HTTPException(status_code=404, detail="Story not found")
 
-        # Ownership check
-        if story.user_id != user["id"]:
-            raise HTTPException(status_code=403, detail="Access denied: you do not own this story")
-
         return story.to_dict()
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to get story {story_id}: {e}")
+        logger.error("Failed to get story %s: %s", story_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to get story: {str(e)}")
 
 
@@ -132,7 +149,7 @@ async def delete_story(story_id: str, user: dict = Depends(get_current_user)):
     """
     try:
         # Delete with ownership verification
-        deleted = StoryService.delete_story(story_id, user_id=user["id"])
+        deleted = await run_in_threadpool(StoryService.delete_story, story_id, user_id=user["id"])
 
         if not deleted:
             raise HTTPException(status_code=404, detail="Story not found or access denied")
@@ -145,7 +162,7 @@ async def delete_story(story_id: str, user: dict = Depends(get_current_user)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to delete story {story_id}: {e}")
+        logger.error("Failed to delete story %s: %s", story_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to delete story: {str(e)}")
 
 
@@ -166,16 +183,12 @@ async def update_story_audio(story_id: str, audio_url: str, user: dict = Depends
         Updated story object
     """
     try:
-        # Verify ownership first
-        story = StoryService.get_story(story_id)
-        if not story:
-            raise HTTPException(status_code=404, detail="Story not found")
-        if story.user_id != user["id"]:
-            raise HTTPException(status_code=403, detail="Access denied: you do not own this story")
-
-        updated_story = StoryService.update_story(
+        # Ownership is checked by the UPDATE itself
+        updated_story = await run_in_threadpool(
+            StoryService.update_story,
             story_id=story_id,
-            audio_url=audio_url
+            audio_url=audio_url,
+            user_id=user["id"]
         )
 
         if not updated_story:
@@ -186,7 +199,7 @@ async def update_story_audio(story_id: str, audio_url: str, user: dict = Depends
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to update story audio {story_id}: {e}")
+        logger.error("Failed to update story audio %s: %s", story_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to update audio: {str(e)}")
 
 
@@ -207,64 +220,29 @@ async def create_similar_story(story_id: str, request: CreateSimilarRequest, use
         New story with modifications applied
     """
     try:
-        # Get original story
-        original_story = StoryService.get_story(story_id)
+        # Get original story (owned by the authenticated user)
+        original_story = await run_in_threadpool(StoryService.get_story, story_id, user_id=user["id"])
         if not original_story:
             raise HTTPException(status_code=404, detail="Original story not found")
 
-        # Ownership check on original story
-        if original_story.user_id != user["id"]:
-            raise HTTPException(status_code=403, detail="Access denied: you do not own this story")
-
-        # Initialize story generator
-        generator = StoryGenerator()
+        generator = get_story_generator()
 
         if generator.provider == "gemini":
-            import google.generativeai as genai
-
-            # Configure safety settings
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
-
-            model = genai.GenerativeModel(
-                model_name=generator.model,
-                system_instruction="You are a professional story writer who creates variations of existing stories while maintaining quality and coherence.",
-                safety_settings=safety_settings
-            )
+            model = generator.gemini_model(SIMILAR_SYSTEM_INSTRUCTION, SAFETY_SETTINGS)
 
             # Build prompt for similar story with modifications
-            similar_prompt = f"""Create a new story similar to the original but with specific modifications.
-
-**Original Story Details:**
-- Theme: {original_story.theme}
-- Style: {original_story.style}
-- Tone: {original_story.tone}
-- Length: {original_story.length}
-
-**Original Story:**
-{original_story.text}
-
-**Requested Modifications:**
-{request.modification_prompt}
-
-**Instructions:**
-1. Create a NEW story (not just edit the original)
-2. Keep the same theme ({original_story.theme}), style ({original_story.style}), and tone ({original_story.tone})
-3. Apply the requested modifications
-4. Maintain similar length (~{original_story.word_count} words)
-5. Keep language simple and appropriate for children (10 years old)
-6. Use short sentences and common words
-7. Ensure the story is complete with beginning, middle, and end
-8. Return ONLY the new story text, nothing else
-
-**New Story:**"""
+            similar_prompt = SIMILAR_PROMPT_TEMPLATE(
+                theme=original_story.theme,
+                style=original_story.style,
+                tone=original_story.tone,
+                length=original_story.length,
+                text=original_story.text,
+                modification_prompt=request.modification_prompt,
+                word_count=original_story.word_count,
+            )
 
             # Generate similar story
-            response = model.generate_content(
+            response = await model.generate_content_async(
                 similar_prompt,
                 generation_config={
                     "temperature": 0.8,
@@ -284,8 +262,9 @@ async def create_similar_story(story_id: str, request: CreateSimilarRequest, use
         word_count = len(new_story_text.split())
 
         # Save new story to database with user ownership
-        new_story_id = str(uuid.uuid4())
-        saved_story = StoryService.create_story(
+        new_story_id = StoryService.generate_id()
+        saved_story = await run_in_threadpool(
+            StoryService.create_story,
             story_id=new_story_id,
             text=new_story_text,
             theme=original_story.theme,
@@ -303,7 +282,7 @@ async def create_similar_story(story_id: str, request: CreateSimilarRequest, use
             }
         )
 
-        logger.info(f"Created similar story {new_story_id} from {story_id}")
+        logger.info("Created similar story %s from %s", new_story_id, story_id)
 
         return CreateSimilarResponse(
             story_id=new_story_id,
@@ -316,5 +295,5 @@ async def create_similar_story(story_id: str, request: CreateSimilarRequest, use
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to create similar story: {e}")
+        logger.error("Failed to create similar story: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create similar story: {str(e)}")
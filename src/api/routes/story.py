@@ -7,10 +7,13 @@ All story endpoints require authentication to ensure:
 3. Proper ownership tracking and access control
 """
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from typing import Dict
-import uuid
 from datetime import datetime
+import asyncio
 import logging
+import orjson
 
 from ..models.story import (
     StoryGenerateRequest,
@@ -21,61 +24,226 @@ from ..models.story import (
     RepromptRequest,
     RepromptResponse,
 )
-from story_narrator.story_generator import StoryGenerator
-from database.story_service import StoryService
+from story_narrator.story_generator import SAFETY_SETTINGS, StoryPrompt, get_story_generator
+from ...database.story_service import StoryService
 from ...auth.dependencies import get_current_user
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/story", tags=["story"])
 
-# Initialize story generator
-story_generator = None
+# generate / ai-improve / reprompt build their response bodies directly and return
+# ORJSONResponse, so the (large) story text isn't re-validated through the response
+# models; the models are only referenced for the OpenAPI schema.
 
-def get_story_generator():
-    global story_generator
-    if story_generator is None:
-        story_generator = StoryGenerator()
-    return story_generator
+# Improvement instructions by improvement type
+IMPROVEMENT_PROMPTS = {
+    "dramatic": "Make this story more dramatic and intense. Add more tension and emotional depth.",
+    "concise": "Make this story more concise while maintaining its key elements and narrative flow.",
+    "grammar": "Improve the grammar, sentence structure, and overall writing quality of this story.",
+    "details": "Add more vivid details, descriptions, and sensory elements to this story.",
+    "tone": "Adjust the tone of this story to be more engaging and appropriate for the narrative.",
+}
 
+DEFAULT_IMPROVEMENT_PROMPT = "Improve this story to make it more engaging and well-written."
 
-@router.post("/generate", response_model=StoryGenerateResponse)
+IMPROVE_SYSTEM_INSTRUCTION = "You are a professional story editor who improves narrative quality."
+
+# Prompt for ai-improve, built once; call with instruction and text
+IMPROVE_PROMPT_TEMPLATE = """{instruction}
+
+Original story:
+{text}
+
+Write the improved version of the story.""".format
+
+REPROMPT_SYSTEM_INSTRUCTION = "You are a professional story editor. Your task is to modify stories based on user instructions while maintaining narrative quality, coherence, and the original story's core elements unless explicitly asked to change them."
+
+# Prompt for reprompt, built once; call with instruction and original_text
+REPROMPT_PROMPT_TEMPLATE = """I have a story that needs to be modified. Please follow these instructions carefully:
+
+**User's Modification Request:**
+{instruction}
+
+**Original Story:**
+{original_text}
+
+**Instructions:**
+1. Apply the requested modifications to the story
+2. Maintain the story's overall quality and readability
+3. Keep the writing style appropriate for children (simple language, short sentences)
+4. Ensure the story flows naturally after modifications
+5. Only return the modified story text, nothing else
+
+**Modified Story:**""".format
+
+# In-flight /generate calls by (user_id, theme, style, tone, length)
+_pending_generations: Dict[tuple, asyncio.Future] = {}
+
+
+def _timestamp(story, field: str) -> str:
+    """
+    ISO timestamp the database recorded for a story, so responses match the
+    stored row; falls back to the current time if the story wasn't saved
+    """
+    value = getattr(story, field, None) if story else None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value or datetime.now().isoformat()
+
+
+async def _generate_and_save(request: StoryGenerateRequest, user: dict) -> Dict:
+    """Generate a story, save it for the user and return the /generate response body"""
+    logger.info("Story generation request from user: %s", user['username'])
+    logger.debug("Theme: %s, Style: %s, Tone: %s, Length: %s", request.theme, request.style, request.tone, request.length)
+
+    generator = get_story_generator()
+
+    # Use the convenience method that handles simple parameters
+    # Awaited on the async client so concurrent generations don't block each other
+    result = await generator.generate_from_simple_prompt_async(
+        theme=request.theme,
+        style=request.style,
+        tone=request.tone,
+        length=request.length
+    )
+
+    # Extract the story text from the result
+    story_text = result["story"]
+
+    # Calculate word count
+    word_count = len(story_text.split())
+
+    # Generate unique story ID
+    story_id = StoryService.generate_id()
+
+    # Save story to database with user ownership
+    saved_story = None
+    try:
+        saved_story = await run_in_threadpool(
+            StoryService.create_story,
+            story_id=story_id,
+            text=story_text,
+            theme=request.theme,
+            style=request.style,
+            tone=request.tone,
+            length=request.length,
+            word_count=word_count,
+            user_id=user["id"],
+            metadata={
+                "model": result["metadata"]["model"],
+                "provider": result["metadata"]["provider"],
+                "username": user["username"],
+            }
+        )
+        logger.info("✓ Story saved to database: %s (owned by user %s)", story_id, user['id'])
+    except Exception as db_error:
+        logger.error("Failed to save story to database: %s", db_error, exc_info=True)
+        # Continue anyway - story generation succeeded
+
+    return dict(
+        story_id=story_id,
+        story_text=story_text,
+        word_count=word_count,
+        metadata={
+            "theme": request.theme,
+            "style": request.style,
+            "tone": request.tone,
+            "length": request.length,
+            "created_at": _timestamp(saved_story, "created_at"),
+            "model": result["metadata"]["model"],
+            "provider": result["metadata"]["provider"],
+        }
+    )
+
+
+@router.post("/generate", responses={200: {"model": StoryGenerateResponse}})
 async def generate_story(request: StoryGenerateRequest, user: dict = Depends(get_current_user)):
     """
     Generate a new story based on user input and save to database
 
+    Identical requests from the same user while one is still generating
+    (double submits, client retries) share that generation and get the same
+    story instead of starting another Gemini call.
+
     Requires:
         - Authentication (Bearer token)
 
     Returns:
         Generated story associated with the authenticated user
     """
+    key = (user["id"], request.theme, request.style, request.tone, request.length)
+    task = _pending_generations.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_and_save(request, user))
+        _pending_generations[key] = task
+        task.add_done_callback(lambda _: _pending_generations.pop(key, None))
+    else:
+        logger.info("Joining in-progress story generation for user: %s", user['username'])
+
     try:
-        logger.info(f"Story generation request from user: {user['username']}")
-        logger.info(f"Theme: {request.theme}, Style: {request.style}, Tone: {request.tone}, Length: {request.length}")
+        # Shielded so a disconnecting client doesn't cancel the generation others are waiting on
+        return ORJSONResponse(await asyncio.shield(task))
 
-        generator = get_story_generator()
+    except Exception as e:
+        logger.error("Failed to generate story: %s", e)
+        raise HTTPException(status_code=500, detail=f"Failed to generate story: {str(e)}")
 
-        # Use the convenience method that handles simple parameters
-        result = generator.generate_from_simple_prompt(
-            theme=request.theme,
-            style=request.style,
-            tone=request.tone,
-            length=request.length
+
+def _sse(event: str, data: dict) -> bytes:
+    """Format one server-sent event"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+@router.post("/generate/stream")
+async def generate_story_stream(request: StoryGenerateRequest, user: dict = Depends(get_current_user)):
+    """
+    Generate a new story, streaming the text as server-sent events
+
+    Same input as /generate. Emits `chunk` events ({"text": ...}) as the model
+    writes, then saves the story and emits one `done` event with the
+    /generate response body (story_id, story_text, word_count, metadata), or
+    an `error` event ({"detail": ...}) if generation fails.
+
+    Requires:
+        - Authentication (Bearer token)
+    """
+    logger.info("Streaming story generation request from user: %s", user['username'])
+
+    generator = get_story_generator()
+    if generator.provider != "gemini":
+        raise HTTPException(
+            status_code=501,
+            detail=f"Streaming not yet implemented for provider: {generator.provider}"
         )
 
-        # Extract the story text from the result
-        story_text = result["story"]
+    story_prompt = StoryPrompt(
+        theme=request.theme,
+        style=request.style,
+        tone=request.tone,
+        length=request.length
+    )
 
-        # Calculate word count
+    async def events():
+        parts = []
+        try:
+            async for text in generator.stream_story_async(story_prompt):
+                parts.append(text)
+                yield _sse("chunk", {"text": text})
+        except Exception as e:
+            logger.error("Failed to stream story: %s", e)
+            yield _sse("error", {"detail": f"Failed to generate story: {str(e)}"})
+            return
+
+        story_text = "".join(parts).strip()
         word_count = len(story_text.split())
+        story_id = StoryService.generate_id()
 
-        # Generate unique story ID
-        story_id = str(uuid.uuid4())
-
-        # Save story to database with user ownership
+        # Save once the full text is known; the client is already showing it
+        saved_story = None
         try:
-            saved_story = StoryService.create_story(
+            saved_story = await run_in_threadpool(
+                StoryService.create_story,
                 story_id=story_id,
                 text=story_text,
                 theme=request.theme,
@@ -85,34 +253,35 @@ async def generate_story(request: StoryGenerateRequest, user: dict = Depends(get
                 word_count=word_count,
                 user_id=user["id"],
                 metadata={
-                    "model": result["metadata"]["model"],
-                    "provider": result["metadata"]["provider"],
+                    "model": generator.model,
+                    "provider": generator.provider,
                     "username": user["username"],
                 }
             )
-            logger.info(f"✓ Story saved to database: {story_id} (owned by user {user['id']})")
+            logger.info("✓ Story saved to database: %s (owned by user %s)", story_id, user['id'])
         except Exception as db_error:
-            logger.error(f"Failed to save story to database: {db_error}", exc_info=True)
-            # Continue anyway - story generation succeeded
+            logger.error("Failed to save story to database: %s", db_error, exc_info=True)
 
-        return StoryGenerateResponse(
-            story_id=story_id,
-            story_text=story_text,
-            word_count=word_count,
-            metadata={
+        yield _sse("done", {
+            "story_id": story_id,
+            "story_text": story_text,
+            "word_count": word_count,
+            "metadata": {
                 "theme": request.theme,
                 "style": request.style,
                 "tone": request.tone,
                 "length": request.length,
-                "created_at": datetime.now().isoformat(),
-                "model": result["metadata"]["model"],
-                "provider": result["metadata"]["provider"],
-            }
-        )
+                "created_at": _timestamp(saved_story, "created_at"),
+                "model": generator.model,
+                "provider": generator.provider,
+            },
+        })
 
-    except Exception as e:
-        logger.error(f"Failed to generate story: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate story: {str(e)}")
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.put("/{story_id}/edit")
@@ -128,50 +297,43 @@ async def edit_story(story_id: str, request: StoryEditRequest, user: dict = Depe
         Updated story information
     """
     try:
-        logger.info(f"Story edit request from user {user['username']} for story {story_id}")
-
-        # Verify story exists
-        story = StoryService.get_story(story_id)
-        if not story:
-            raise HTTPException(
-                status_code=404,
-                detail="Story not found"
-            )
-
-        # Ownership check - user can only edit their own stories
-        if story.user_id != user["id"]:
-            raise HTTPException(
-                status_code=403,
-                detail="Access denied: you do not own this story"
-            )
-        logger.info(f"Story found: {story.id}, owned by user {user['id']}, proceeding with edit")
+        logger.info("Story edit request from user %s for story %s", user['username'], story_id)
 
-        # Update story in database
+        # Update story in database; the ownership check is part of the UPDATE
         try:
-            StoryService.update_story(story_id=story_id, text=request.text)
-            logger.info(f"✓ Story updated: {story_id}")
+            updated_story = await run_in_threadpool(
+                StoryService.update_story, story_id=story_id, text=request.text, user_id=user["id"]
+            )
         except Exception as db_error:
-            logger.error(f"Failed to update story in database: {db_error}")
+            logger.error("Failed to update story in database: %s", db_error)
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to update story: {str(db_error)}"
             )
 
+        # Missing and not-owned stories are both reported as not found
+        if not updated_story:
+            raise HTTPException(
+                status_code=404,
+                detail="Story not found"
+            )
+        logger.info("✓ Story updated: %s", story_id)
+
         return {
             "story_id": story_id,
             "story_text": request.text,
             "revision_number": 1,
-            "updated_at": datetime.now().isoformat(),
+            "updated_at": _timestamp(updated_story, "updated_at"),
         }
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Failed to edit story: {e}")
+        logger.error("Failed to edit story: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to edit story: {str(e)}")
 
 
-@router.post("/ai-improve", response_model=AIImproveResponse)
+@router.post("/ai-improve", responses={200: {"model": AIImproveResponse}})
 async def improve_story_with_ai(request: AIImproveRequest, user: dict = Depends(get_current_user)):
     """
     Improve a story using AI
@@ -183,40 +345,23 @@ async def improve_story_with_ai(request: AIImproveRequest, user: dict = Depends(
         Original and improved versions of the story
     """
     try:
-        logger.info(f"AI improve request from user {user['username']}, type: {request.improvementType}")
+        logger.info("AI improve request from user %s, type: %s", user['username'], request.improvementType)
 
         generator = get_story_generator()
 
         # Create improvement prompt based on type
-        improvement_prompts = {
-            "dramatic": "Make this story more dramatic and intense. Add more tension and emotional depth.",
-            "concise": "Make this story more concise while maintaining its key elements and narrative flow.",
-            "grammar": "Improve the grammar, sentence structure, and overall writing quality of this story.",
-            "details": "Add more vivid details, descriptions, and sensory elements to this story.",
-            "tone": "Adjust the tone of this story to be more engaging and appropriate for the narrative.",
-        }
-
-        improvement_instruction = improvement_prompts.get(
+        improvement_instruction = IMPROVEMENT_PROMPTS.get(
             request.improvementType,
-            request.customInstruction or "Improve this story to make it more engaging and well-written."
+            request.customInstruction or DEFAULT_IMPROVEMENT_PROMPT
         )
 
         # Use Gemini directly for improvements
         if generator.provider == "gemini":
-            import google.generativeai as genai
-            model = genai.GenerativeModel(
-                model_name=generator.model,
-                system_instruction="You are a professional story editor who improves narrative quality."
-            )
+            model = generator.gemini_model(IMPROVE_SYSTEM_INSTRUCTION)
 
-            full_prompt = f"""{improvement_instruction}
-
-Original story:
-{request.text}
+            full_prompt = IMPROVE_PROMPT_TEMPLATE(instruction=improvement_instruction, text=request.text)
 
-Write the improved version of the story."""
-
-            response = model.generate_content(
+            response = await model.generate_content_async(
                 full_prompt,
                 generation_config={
                     "temperature": 0.7,
@@ -228,17 +373,17 @@ Write the improved version of the story."""
             # Fallback for other providers (not implemented yet)
             improved_text = request.text
 
-        return AIImproveResponse(
+        return ORJSONResponse(dict(
             original=request.text,
             improved=improved_text,
             changes_summary=f"Applied {request.improvementType} improvement to the story."
-        )
+        ))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to improve story: {str(e)}")
 
 
-@router.post("/reprompt", response_model=RepromptResponse)
+@router.post("/reprompt", responses={200: {"model": RepromptResponse}})
 async def reprompt_story(request: RepromptRequest, user: dict = Depends(get_current_user)):
     """
     Modify an existing story using custom AI instructions.
@@ -252,68 +397,36 @@ async def reprompt_story(request: RepromptRequest, user: dict = Depends(get_curr
         Original and modified versions of the story
     """
     try:
-        logger.info(f"Reprompt request from user {user['username']} for story {request.story_id}")
-        logger.info(f"Instruction: {request.instruction}")
+        logger.info("Reprompt request from user %s for story %s", user['username'], request.story_id)
+        logger.debug("Instruction: %s", request.instruction)
 
-        # Verify story exists
-        logger.debug(f"Looking up story with ID: {request.story_id}")
-        story = StoryService.get_story(request.story_id)
+        # Verify the user owns the story before paying for generation (one query;
+        # another user's story is reported as not found)
+        logger.debug("Looking up story with ID: %s", request.story_id)
+        story = await run_in_threadpool(StoryService.get_story, request.story_id, user_id=user["id"])
 
         if not story:
-            logger.warning(f"Story not found in database: {request.story_id}")
+            logger.warning("Story not found in database: %s", request.story_id)
             raise HTTPException(
                 status_code=404,
                 detail="Story not found"
             )
-
-        # Ownership check - user can only reprompt their own stories
-        if story.user_id != user["id"]:
-            raise HTTPException(
-                status_code=403,
-                detail="Access denied: you do not own this story"
-            )
-        logger.info(f"Story found: {story.id}, owned by user {user['id']}, title: {story.title[:50]}...")
+        logger.debug("Story found: %s, owned by user %s, title: %.50s...", story.id, user['id'], story.title)
 
         generator = get_story_generator()
 
         # Build the AI prompt for story modification
         if generator.provider == "gemini":
-            import google.generativeai as genai
-
-            # Configure safety settings
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
-
-            model = genai.GenerativeModel(
-                model_name=generator.model,
-                system_instruction="You are a professional story editor. Your task is to modify stories based on user instructions while maintaining narrative quality, coherence, and the original story's core elements unless explicitly asked to change them.",
-                safety_settings=safety_settings
-            )
+            model = generator.gemini_model(REPROMPT_SYSTEM_INSTRUCTION, SAFETY_SETTINGS)
 
             # Create the modification prompt
-            modification_prompt = f"""I have a story that needs to be modified. Please follow these instructions carefully:
-
-**User's Modification Request:**
-{request.instruction}
-
-**Original Story:**
-{request.original_text}
-
-**Instructions:**
-1. Apply the requested modifications to the story
-2. Maintain the story's overall quality and readability
-3. Keep the writing style appropriate for children (simple language, short sentences)
-4. Ensure the story flows naturally after modifications
-5. Only return the modified story text, nothing else
-
-**Modified Story:**"""
+            modification_prompt = REPROMPT_PROMPT_TEMPLATE(
+                instruction=request.instruction,
+                original_text=request.original_text,
+            )
 
             # Generate the modified story
-            response = model.generate_content(
+            response = await model.generate_content_async(
                 modification_prompt,
                 generation_config={
                     "temperature": 0.7,
@@ -333,28 +446,32 @@ async def reprompt_story(request: RepromptRequest, user: dict = Depends(get_curr
         word_count = len(modified_text.split())
 
         # Update story in database with modified text
+        updated_story = None
         try:
-            StoryService.update_story(
+            updated_story = await run_in_threadpool(
+                StoryService.update_story,
                 story_id=request.story_id,
-                text=modified_text
+                text=modified_text,
+                word_count=word_count,
+                user_id=user["id"]
             )
-            logger.info(f"Story updated after reprompt: {request.story_id}")
+            logger.info("Story updated after reprompt: %s", request.story_id)
         except Exception as db_error:
-            logger.error(f"Failed to update story in database: {db_error}")
+            logger.error("Failed to update story in database: %s", db_error)
             # Continue anyway - reprompt succeeded
 
-        return RepromptResponse(
+        return ORJSONResponse(dict(
             story_id=request.story_id,
             original_text=request.original_text,
             modified_text=modified_text,
             instruction=request.instruction,
             word_count=word_count,
-            created_at=datetime.now().isoformat()
-        )
+            created_at=_timestamp(updated_story, "updated_at")
+        ))
 
     except HTTPException:
         # Re-raise HTTP exceptions as-is (404, 403, etc.)
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in reprompt: {e}", exc_info=True)
+        logger.error("Unexpected error in reprompt: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to reprompt story: {str(e)}")
@@ -6,17 +6,23 @@ This is a critical optimization module that:
 2. Falls back to recomputing only if cache miss (400-1100ms)
 3. Optionally requires authentication for user-specific voices
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, Optional
 import uuid
-import asyncio
 from datetime import datetime
 import base64
+import hashlib
+import importlib.util
 import os
+import time
 from pathlib import Path
 import re
+import shutil
+import io
 import logging
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
 from ..models.tts import (
     TTSGenerateRequest,
@@ -25,15 +31,11 @@ from ..models.tts import (
 )
 from story_narrator.text_processor import TextProcessor
 from ...auth.dependencies import get_optional_user
-from ...database import voice_service
+from ...database import task_service, voice_service
 
-# AudioSynthesizer requires torch - make it optional
-try:
-    from story_narrator.audio_synthesizer import AudioSynthesizer
-    _has_audio_synthesizer = True
-except ImportError:
-    _has_audio_synthesizer = False
-    AudioSynthesizer = None
+# AudioSynthesizer requires torch - make it optional (checked here, imported on first use
+# in get_synthesizer, so loading this route module doesn't import torch)
+_has_audio_synthesizer = importlib.util.find_spec("torch") is not None
 
 # RunPodTTSClient doesn't require torch - use as fallback
 try:
@@ -55,15 +57,64 @@ text_processor = TextProcessor(
 
 router = APIRouter(prefix="/api/v1/tts", tags=["tts"])
 
-# Task storage (in production, use Redis or a database)
-tasks: Dict[str, Dict] = {}
+# sanitize_text_for_tts: typographic punctuation mapped to ASCII, and the cleanup patterns
+_TTS_TRANSLATION = str.maketrans({
+    "\u201c": '"', "\u201d": '"',   # curly double quotes
+    "\u2018": "'", "\u2019": "'",   # curly single quotes / apostrophe
+    "\u2014": "-", "\u2013": "-",   # em / en dash
+    "\u2026": "...",                # ellipsis
+})
+_NON_ASCII_RE = re.compile(r'[^\x00-\x7F]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Generated narrations and uploaded base64 voice samples (served under /output)
+OUTPUT_DIR = Path("src/output")
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# Synthesized RunPod chunks on disk, keyed by text + voice sample content + TTS params,
+# so repeated paragraphs and retries skip the GPU round-trip. Kept next to the database
+# (not under OUTPUT_DIR, which is served publicly); entries expire after the TTL and are
+# swept at startup and then at most every TTS_CACHE_SWEEP_INTERVAL seconds
+TTS_CACHE_DIR = Path(__file__).parents[3] / "data" / "tts_cache"
+TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+TTS_CACHE_TTL = int(os.getenv("TTS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+TTS_CACHE_SWEEP_INTERVAL = 3600
+_last_cache_sweep = 0.0
 
 # Initialize synthesizer (could be AudioSynthesizer or RunPodTTSClient)
 synthesizer = None
 
-# Thread pool for blocking I/O operations (RunPod API calls)
-# This prevents blocking the FastAPI event loop during audio generation
-executor = ThreadPoolExecutor(max_workers=4)
+# Job queue for narrations: generate_audio_task is submitted here straight from /generate, so
+# jobs run outside the request/event loop and beyond TTS_TASK_CONCURRENCY they wait as "queued"
+TTS_TASK_CONCURRENCY = int(os.getenv("TTS_TASK_CONCURRENCY", "4"))
+executor = ThreadPoolExecutor(max_workers=TTS_TASK_CONCURRENCY, thread_name_prefix="tts-task")
+
+# Separate pool for the per-chunk RunPod requests of a narration, so chunks are synthesized
+# concurrently (up to RUNPOD_CHUNK_CONCURRENCY in flight per process, shared by all tasks)
+RUNPOD_CHUNK_CONCURRENCY = int(os.getenv("RUNPOD_CHUNK_CONCURRENCY", "8"))
+chunk_executor = ThreadPoolExecutor(max_workers=RUNPOD_CHUNK_CONCURRENCY, thread_name_prefix="runpod-chunk")
+
+
+def sweep_tts_cache():
+    """Delete expired chunk cache files (and the old cache dir that sat under /output)"""
+    global _last_cache_sweep
+    _last_cache_sweep = time.monotonic()
+    shutil.rmtree(OUTPUT_DIR / "tts_cache", ignore_errors=True)
+
+    cutoff = time.time() - TTS_CACHE_TTL
+    removed = 0
+    for path in TTS_CACHE_DIR.iterdir():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            pass
+    if removed:
+        logger.info("Removed %d expired TTS cache files", removed)
+
+
+chunk_executor.submit(sweep_tts_cache)
 
 def get_synthesizer():
     """Get TTS synthesizer - uses RunPodTTSClient if torch is not available"""
@@ -83,6 +134,7 @@ def get_synthesizer():
                     detail=f"RunPod configuration error: {str(e)}. Please set RUNPOD_API_KEY and RUNPOD_ENDPOINT_ID environment variables."
                 )
         elif _has_audio_synthesizer:
+            from story_narrator.audio_synthesizer import AudioSynthesizer
             logger.info("Using AudioSynthesizer with RunPod")
             synthesizer = AudioSynthesizer(
                 device="cpu",
@@ -102,24 +154,75 @@ def sanitize_text_for_tts(text: str) -> str:
     Sanitize text to make it more suitable for TTS synthesis.
     Removes special characters and formatting that might confuse the model.
     """
-    # Replace smart quotes with regular quotes
-    text = text.replace('"', '"').replace('"', '"')
-    text = text.replace(''', "'").replace(''', "'")
+    # Smart quotes, dashes and ellipsis to ASCII in one pass
+    text = text.translate(_TTS_TRANSLATION)
+
+    # Remove any remaining non-ASCII characters that might cause issues
+    # But keep common punctuation
+    text = _NON_ASCII_RE.sub('', text)
 
-    # Replace em dashes and en dashes with regular hyphens
-    text = text.replace('—', '-').replace('–', '-')
+    # Collapse whitespace (after the removal above, which can leave doubled spaces)
+    return _WHITESPACE_RE.sub(' ', text).strip()
 
-    # Replace ellipsis with three periods
-    text = text.replace('…', '...')
 
-    # Remove multiple spaces
-    text = re.sub(r'\s+', ' ', text)
+@lru_cache(maxsize=32)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    """Content hash of a file; cached per file version (mtime/size are part of the key)"""
+    return hashlib.blake2b(Path(path).read_bytes(), digest_size=16).hexdigest()
 
-    # Remove any remaining non-ASCII characters that might cause issues
-    # But keep common punctuation
-    text = re.sub(r'[^\x00-\x7F]+', '', text)
 
-    return text.strip()
+def _voice_digest(voice_sample_path: Path) -> str:
+    """Content hash of a voice sample, without re-reading it while it is unchanged"""
+    stat = voice_sample_path.stat()
+    return _file_digest(str(voice_sample_path), stat.st_mtime_ns, stat.st_size)
+
+
+def _synthesize_chunk_cached(synth, text: str, voice_sample_path: str, voice_digest: str,
+                             request: TTSGenerateRequest) -> bytes:
+    """Synthesize one chunk via RunPod, reusing a cached result for the same inputs"""
+    key = hashlib.blake2b(
+        f"{voice_digest}|{request.exaggeration}|{request.temperature}|{request.cfgWeight}|{text}".encode(),
+        digest_size=16,
+    ).hexdigest()
+    cache_path = TTS_CACHE_DIR / f"{key}.wav"
+
+    try:
+        if time.time() - cache_path.stat().st_mtime < TTS_CACHE_TTL:
+            logger.debug("TTS cache hit: %s", key)
+            return cache_path.read_bytes()
+        cache_path.unlink()
+    except OSError:
+        pass
+
+    audio_data = synth.synthesize_text(
+        text=text,
+        voice_sample_path=voice_sample_path,
+        exaggeration=request.exaggeration,
+        temperature=request.temperature,
+        cfg_weight=request.cfgWeight
+    )
+
+    # Write then rename, so concurrent readers never see a partial file
+    try:
+        tmp_path = cache_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(audio_data)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Failed to cache TTS chunk: %s", e)
+    return audio_data
+
+
+def _write_chunk(out, audio_data: bytes, pause: float):
+    """Decode one chunk's WAV and append its frames, then the pause, to an open SoundFile"""
+    import soundfile as sf
+    import numpy as np
+
+    frames, _ = sf.read(io.BytesIO(audio_data), dtype="int16")
+    if frames.ndim > 1:
+        frames = frames[:, 0]
+    out.write(frames)
+    if pause > 0:
+        out.write(np.zeros(int(pause * out.samplerate), dtype=np.int16))
 
 
 def convert_to_mono(audio_path: Path) -> Path:
@@ -127,21 +230,21 @@ def convert_to_mono(audio_path: Path) -> Path:
     Convert audio file to mono and resample to 24kHz (Chatterbox TTS requirement).
     Returns path to processed audio file.
     """
-    import librosa
+    import soxr
     import soundfile as sf
     import numpy as np
 
-    # Read audio file and resample to 24kHz
+    # Read audio file (as float32, half the memory of the float64 default) and resample to 24kHz
     target_sr = 24000  # Chatterbox TTS expects 24kHz
-    audio, sr = sf.read(str(audio_path))
+    audio, sr = sf.read(str(audio_path), dtype="float32")
 
-    # Convert to mono if stereo (2 channels)
-    if len(audio.shape) > 1 and audio.shape[1] == 2:
-        audio = np.mean(audio, axis=1)
+    # Convert to mono if multi-channel
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype=np.float32)
 
-    # Resample to target sample rate if needed
+    # Resample to target sample rate if needed (soxr directly, without importing librosa)
     if sr != target_sr:
-        audio = librosa.resample(audio, orig_sr=sr, target_sr=target_sr)
+        audio = soxr.resample(audio, sr, target_sr, quality="HQ")
 
     # Save processed audio
     processed_path = audio_path.with_stem(f"{audio_path.stem}_processed")
@@ -160,11 +263,15 @@ def generate_audio_task(task_id: str, request: TTSGenerateRequest, user_id: Opti
     instead of recomputing them every time (400-1100ms).
     """
     try:
-        tasks[task_id]["status"] = "processing"
-        tasks[task_id]["progress"] = 10
+        if not task_service.update_task(task_id, status="processing", progress=10):
+            logger.warning(f"Task {task_id} is no longer pending; skipping")
+            return
 
         synth = get_synthesizer()
 
+        if time.monotonic() - _last_cache_sweep > TTS_CACHE_SWEEP_INTERVAL:
+            chunk_executor.submit(sweep_tts_cache)
+
         # Get voice profile from database
         voice_profile = None
         voice_sample_path = None
@@ -175,12 +282,11 @@ def generate_audio_task(task_id: str, request: TTSGenerateRequest, user_id: Opti
                 # Get default voice from database (pre-cached on startup)
                 voice_profile = voice_service.get_default_voice(user_id)
                 if not voice_profile:
-                    tasks[task_id]["status"] = "failed"
-                    tasks[task_id]["error"] = "No default voice available. Please upload a voice sample first."
+                    task_service.update_task(task_id, status="failed", error="No default voice available. Please upload a voice sample first.")
                     return
                 voice_sample_path = Path(voice_profile.file_path)
                 logger.info(f"Using default voice: {voice_profile.voice_id}")
-                tasks[task_id]["progress"] = 20
+                task_service.update_task(task_id, progress=20)
 
             # Check if it's a voice ID (UUID format) or base64 data
             elif len(request.voiceSample) < 100:  # Likely a voice ID
@@ -188,8 +294,7 @@ def generate_audio_task(task_id: str, request: TTSGenerateRequest, user_id: Opti
                 voice_profile = voice_service.get_voice_by_id(request.voiceSample)
 
                 if not voice_profile:
-                    tasks[task_id]["status"] = "failed"
-                    tasks[task_id]["error"] = f"Voice sample not found: {request.voiceSample}"
+                    task_service.update_task(task_id, status="failed", error=f"Voice sample not found: {request.voiceSample}")
                     return
 
                 # Verify ownership if user_id provided
@@ -197,47 +302,41 @@ def generate_audio_task(task_id: str, request: TTSGenerateRequest, user_id: Opti
                     # Check if it's a system voice (user_id=1)
                     SYSTEM_USER_ID = int(os.getenv("SYSTEM_USER_ID", "1"))
                     if voice_profile.user_id != SYSTEM_USER_ID:
-                        tasks[task_id]["status"] = "failed"
-                        tasks[task_id]["error"] = "Access denied: This voice belongs to another user"
+                        task_service.update_task(task_id, status="failed", error="Access denied: This voice belongs to another user")
                         return
 
                 voice_sample_path = Path(voice_profile.file_path)
                 logger.info(f"Using voice from database: {voice_profile.voice_id}")
-                tasks[task_id]["progress"] = 20
+                task_service.update_task(task_id, progress=20)
 
             else:
                 # It's base64 encoded data (legacy support - no caching)
                 try:
                     logger.warning("Base64 voice data provided - skipping cache (will be slower)")
                     voice_data = base64.b64decode(request.voiceSample)
-                    voice_sample_path = Path("src/output") / f"voice_sample_{task_id}.wav"
-                    voice_sample_path.parent.mkdir(parents=True, exist_ok=True)
+                    voice_sample_path = OUTPUT_DIR / f"voice_sample_{task_id}.wav"
                     with open(voice_sample_path, "wb") as f:
                         f.write(voice_data)
-                    tasks[task_id]["progress"] = 20
+                    task_service.update_task(task_id, progress=20)
                 except Exception as e:
-                    tasks[task_id]["status"] = "failed"
-                    tasks[task_id]["error"] = f"Failed to decode voice sample: {str(e)}"
+                    task_service.update_task(task_id, status="failed", error=f"Failed to decode voice sample: {str(e)}")
                     return
 
         # If no voice sample provided, use default
         if not voice_profile and not voice_sample_path:
             voice_profile = voice_service.get_default_voice(user_id)
             if not voice_profile:
-                tasks[task_id]["status"] = "failed"
-                tasks[task_id]["error"] = "No voice samples available. Please upload a voice sample first."
+                task_service.update_task(task_id, status="failed", error="No voice samples available. Please upload a voice sample first.")
                 return
             voice_sample_path = Path(voice_profile.file_path)
             logger.info(f"Using default voice: {voice_profile.voice_id}")
 
-        tasks[task_id]["progress"] = 30
+        task_service.update_task(task_id, progress=30)
 
         # Generate audio
-        output_dir = Path("src/output")
-        output_dir.mkdir(parents=True, exist_ok=True)
-        output_path = output_dir / f"narration_{task_id}.wav"
+        output_path = OUTPUT_DIR / f"narration_{task_id}.wav"
 
-        tasks[task_id]["progress"] = 40
+        task_service.update_task(task_id, progress=40)
 
         # Process text
         logger.info(f"Processing text ({len(request.text)} chars)...")
@@ -248,35 +347,61 @@ def generate_audio_task(task_id: str, request: TTSGenerateRequest, user_id: Opti
 
         logger.info(f"Text processed into {len(text_chunks)} chunks")
 
-        tasks[task_id]["progress"] = 50
+        task_service.update_task(task_id, progress=50)
 
         # Use different synthesis methods based on synthesizer type
         # Check by class name to avoid issues when RunPodTTSClient is None
         is_runpod = _has_runpod_client and type(synth).__name__ == 'RunPodTTSClient'
 
         if is_runpod:
-            # RunPodTTSClient: synthesize each chunk and combine
-            logger.info("Using RunPodTTSClient for synthesis")
-            audio_segments = []
-
-            for i, chunk_text in enumerate(text_chunks):
-                logger.info(f"Synthesizing chunk {i+1}/{len(text_chunks)}")
-                audio_data = synth.synthesize_text(
-                    text=chunk_text,
-                    voice_sample_path=str(voice_sample_path),
-                    exaggeration=request.exaggeration,
-                    temperature=request.temperature,
-                    cfg_weight=request.cfgWeight
-                )
-                audio_segments.append(audio_data)
-                tasks[task_id]["progress"] = 50 + int(40 * (i + 1) / len(text_chunks))
-
-            # Combine audio segments and save
-            with open(output_path, 'wb') as f:
-                for segment in audio_segments:
-                    f.write(segment)
+            # RunPodTTSClient: synthesize the chunks concurrently and combine them in order
+            logger.info(f"Using RunPodTTSClient for synthesis ({len(text_chunks)} chunks)")
+            # Cache key uses the voice sample's content, so a replaced sample never hits old audio
+            voice_digest = _voice_digest(voice_sample_path)
+            futures = {
+                chunk_executor.submit(
+                    _synthesize_chunk_cached,
+                    synth,
+                    chunk_text,
+                    str(voice_sample_path),
+                    voice_digest,
+                    request
+                ): i
+                for i, chunk_text in enumerate(text_chunks)
+            }
+            import soundfile as sf
+
+            # Decode chunks into one WAV as they arrive; a finished chunk is only held
+            # until the ones before it are written
+            ready: Dict[int, bytes] = {}
+            next_index = 0
+            out = None
 
-            result = {"output_path": str(output_path)}
+            try:
+                for done, future in enumerate(as_completed(futures), 1):
+                    ready[futures[future]] = future.result()
+                    while next_index in ready:
+                        audio_data = ready.pop(next_index)
+                        if out is None:
+                            sample_rate = sf.info(io.BytesIO(audio_data)).samplerate
+                            out = sf.SoundFile(str(output_path), 'w', samplerate=sample_rate,
+                                               channels=1, subtype='PCM_16')
+                        _write_chunk(out, audio_data, pause_durations[next_index])
+                        next_index += 1
+                    task_service.update_task(task_id, progress=50 + int(40 * done / len(text_chunks)))
+            except Exception:
+                # Don't spend RunPod time on chunks of a narration that already failed
+                for future in futures:
+                    future.cancel()
+                raise
+            finally:
+                if out is not None:
+                    out.close()
+
+            result = {
+                "output_path": str(output_path),
+                "duration_seconds": out.frames / out.samplerate if out is not None else 0,
+            }
 
         else:
             # AudioSynthesizer: use CACHED EMBEDDINGS for 10-20x speedup
@@ -332,36 +457,27 @@ def generate_audio_task(task_id: str, request: TTSGenerateRequest, user_id: Opti
                 show_progress=False
             )
 
-        tasks[task_id]["progress"] = 90
+        task_service.update_task(task_id, progress=90)
 
         # Generate URL for the audio file
         audio_url = f"/output/narration_{task_id}.wav"
 
-        tasks[task_id]["status"] = "completed"
-        tasks[task_id]["progress"] = 100
-        tasks[task_id]["audio_url"] = audio_url
-        tasks[task_id]["completed_at"] = datetime.now().isoformat()
-        tasks[task_id]["duration"] = result.get("duration_seconds", 0)
+        task_service.update_task(
+            task_id,
+            status="completed",
+            progress=100,
+            audio_url=audio_url,
+            completed_at=datetime.now().isoformat(),
+            duration=result.get("duration_seconds", 0)
+        )
 
     except Exception as e:
-        tasks[task_id]["status"] = "failed"
-        tasks[task_id]["error"] = str(e)
-        tasks[task_id]["progress"] = 0
-
-
-async def run_generation_in_thread(task_id: str, request: TTSGenerateRequest, user_id: Optional[int]):
-    """
-    Wrapper to run generate_audio_task in a thread pool executor.
-    This prevents blocking the FastAPI event loop during long-running RunPod API calls.
-    """
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(executor, generate_audio_task, task_id, request, user_id)
+        task_service.update_task(task_id, status="failed", error=str(e), progress=0)
 
 
 @router.post("/generate", response_model=TTSGenerateResponse)
 async def generate_audio(
     request: TTSGenerateRequest,
-    background_tasks: BackgroundTasks,
     user: Optional[dict] = Depends(get_optional_user),
 ):
     """
@@ -381,28 +497,25 @@ async def generate_audio(
         logger.info(f"Voice: {request.voiceSample}, Exaggeration: {request.exaggeration}")
 
         # Generate unique task ID
-        task_id = str(uuid.uuid4())
+        task_id = uuid.uuid4().hex
         logger.info(f"Generated task ID: {task_id}")
 
-        # Initialize task
-        tasks[task_id] = {
-            "status": "queued",
-            "progress": 0,
-            "created_at": datetime.now().isoformat(),
-            "story_id": request.storyId,
-            "user_id": user_id,
-        }
+        # Initialize task (in the database, so every API worker can report its status)
+        if not await run_in_threadpool(task_service.create_task, task_id, request.storyId, user_id):
+            raise HTTPException(status_code=500, detail="Failed to record audio generation task")
 
-        # Start background task with user_id for voice access control
-        # Run in thread pool to avoid blocking the event loop during RunPod API calls
-        background_tasks.add_task(run_generation_in_thread, task_id, request, user_id)
-        logger.info(f"Background task queued for task {task_id}, returning response")
+        # Enqueue on the TTS job pool (with user_id for voice access control); the job
+        # is not tied to this request, and waits as "queued" while the pool is busy
+        executor.submit(generate_audio_task, task_id, request, user_id)
+        logger.info(f"Task {task_id} queued, returning response")
 
         return TTSGenerateResponse(
             task_id=task_id,
             message="Audio generation started"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to start audio generation: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to start audio generation: {str(e)}")
@@ -413,11 +526,10 @@ async def get_task_status(task_id: str):
     """
     Get the status of an audio generation task
     """
-    if task_id not in tasks:
+    task = await run_in_threadpool(task_service.get_task, task_id)
+    if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    task = tasks[task_id]
-
     # Calculate estimated time remaining
     estimated_time = None
     if task["status"] == "processing" and task["progress"] > 0:
@@ -100,7 +100,7 @@ async def upload_voice_sample(
         voice_name = name if name else Path(file.filename).stem
 
         # Save to temporary location
-        temp_path = Path(f"/tmp/{uuid.uuid4()}{file_extension}")
+        temp_path = Path(f"/tmp/{uuid.uuid4().hex}{file_extension}")
         try:
             with open(temp_path, "wb") as buffer:
                 shutil.copyfileobj(file.file, buffer)
@@ -1,10 +1,12 @@
 """
 Authentication Module
-JWT-based authentication with bcrypt password hashing
+JWT-based authentication with Argon2id password hashing
 """
 from .security import (
     hash_password,
     verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     create_refresh_token,
     decode_token,
@@ -14,6 +16,8 @@ from .dependencies import get_current_user, get_optional_user
 __all__ = [
     "hash_password",
     "verify_password",
+    "hash_password_async",
+    "verify_password_async",
     "create_access_token",
     "create_refresh_token",
     "decode_token",
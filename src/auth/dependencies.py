@@ -2,11 +2,15 @@
 FastAPI dependencies for authentication
 """
 import logging
+import os
+import time
+from collections import OrderedDict
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from .security import decode_token, validate_token_type
+from .security import decode_token
 from ..database.user_service import get_user_by_id
 
 logger = logging.getLogger(__name__)
@@ -14,8 +18,47 @@ logger = logging.getLogger(__name__)
 # HTTP Bearer token scheme for FastAPI
 security = HTTPBearer()
 
+# Per-process cache of authenticated user dicts keyed by user ID: {id: (expires_at, user)}
+# Entries live USER_CACHE_TTL seconds. Each Gunicorn worker has its own cache and invalidation
+# only reaches the local one, so on other workers a deactivation or profile change applies only
+# once their entry expires; the TTL is kept short to bound that window
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL_SECONDS", "5"))
+USER_CACHE_SIZE = 1024
+_user_cache = OrderedDict()
+
+
+# Per-process cache of verified access-token payloads keyed by the raw token, so repeat
+# requests with the same token skip the signature check; entries are used only until "exp"
+TOKEN_CACHE_SIZE = 4096
+_token_cache = OrderedDict()
+
+
+def _decode_access_token(token: str) -> Optional[dict]:
+    """Decode a token, reusing the payload of a recently verified, unexpired one"""
+    payload = _token_cache.get(token)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+
+    payload = decode_token(token)
+    if payload and payload.get("type") == "access":
+        _token_cache[token] = payload
+        _token_cache.move_to_end(token)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return payload
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """
+    Drop a user from this worker's authenticated-user cache (call after changing the user)
+
+    Other workers keep their cached copy until it expires (at most USER_CACHE_TTL seconds).
+    """
+    _user_cache.pop(user_id, None)
+
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
     """
@@ -27,7 +70,13 @@ async def get_current_user(
             # user is a dict with id, username, email, etc.
             return {"message": f"Hello {user['username']}"}
 
+    The resolved user is memoized on request.state, so any further lookups
+    within the same request skip the token decode and database query, and
+    cached per process for USER_CACHE_TTL seconds across requests. Verified
+    token payloads are cached until the token's own expiry.
+
     Args:
+        request: Current request (used to memoize the user)
         credentials: HTTP Bearer token from Authorization header
 
     Returns:
@@ -36,10 +85,14 @@ async def get_current_user(
     Raises:
         HTTPException: 401 if authentication fails
     """
+    cached_user = getattr(request.state, "_user", None)
+    if cached_user is not None:
+        return cached_user
+
     token = credentials.credentials
 
-    # Decode token
-    payload = decode_token(token)
+    # Decode token (cached per token until it expires)
+    payload = _decode_access_token(token)
     if not payload:
         logger.warning("Invalid or expired token")
         raise HTTPException(
@@ -48,9 +101,9 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Validate it's an access token (not refresh token)
-    if not validate_token_type(token, "access"):
-        logger.warning("Token type mismatch: expected access token")
+    # Validate it's an access token (not refresh token), reusing the decoded payload
+    if payload.get("type") != "access":
+        logger.warning("Token type mismatch: expected access token, got %s", payload.get('type'))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token type",
@@ -67,10 +120,17 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Serve recently loaded users from the cache, skipping the database query
+    user_id = int(user_id)
+    cached = _user_cache.get(user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        request.state._user = cached[1]
+        return cached[1]
+
     # Get user from database
-    user = get_user_by_id(int(user_id))
+    user = await run_in_threadpool(get_user_by_id, user_id)
     if not user:
-        logger.warning(f"User {user_id} not found in database")
+        logger.warning("User %s not found in database", user_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
@@ -79,19 +139,25 @@ async def get_current_user(
 
     # Check if user is active
     if not user.is_active:
-        logger.warning(f"User {user_id} is inactive")
+        logger.warning("User %s is inactive", user_id)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive",
         )
 
-    logger.debug(f"User {user.username} authenticated successfully")
+    logger.debug("User %s authenticated successfully", user.username)
 
     # Return user as dict (exclude password hash)
-    return user.to_dict(include_password=False)
+    request.state._user = user.to_dict(include_password=False)
+    _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL, request.state._user)
+    _user_cache.move_to_end(user_id)
+    if len(_user_cache) > USER_CACHE_SIZE:
+        _user_cache.popitem(last=False)
+    return request.state._user
 
 
 async def get_optional_user(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[dict]:
     """
@@ -107,6 +173,7 @@ async def get_optional_user(
             return {"message": "Hello guest"}
 
     Args:
+        request: Current request
         credentials: Optional HTTP Bearer token
 
     Returns:
@@ -116,7 +183,7 @@ async def get_optional_user(
         return None
 
     try:
-        return await get_current_user(credentials)
+        return await get_current_user(request, credentials)
     except HTTPException:
         return None
 
@@ -156,7 +223,7 @@ async def get_current_verified_user(
         HTTPException: 403 if user is not verified
     """
     if not user.get("is_verified"):
-        logger.warning(f"User {user['id']} is not verified")
+        logger.warning("User %s is not verified", user['id'])
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Email verification required",
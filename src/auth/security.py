@@ -2,7 +2,10 @@
 Security utilities for JWT authentication and password hashing
 """
 import os
+import asyncio
 import logging
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
@@ -13,28 +16,59 @@ from dotenv import load_dotenv
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-# Password hashing context with bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Argon2id cost parameters (memory in KiB); each concurrent hash holds ARGON2_MEMORY_COST of RAM
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+
+# Password hashing context: new hashes use Argon2id; existing bcrypt hashes still
+# verify and are flagged by needs_update() so login can upgrade them
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__rounds=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=1,
+    argon2__digest_size=32,
+    argon2__salt_size=16,
+)
 
 # JWT configuration
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-secret-key-change-in-production")
 JWT_ALGORITHM = "HS256"
+JWT_ALGORITHMS = [JWT_ALGORITHM]
+# Signing key encoded once instead of on every encode/decode
+_JWT_KEY = JWT_SECRET_KEY.encode("utf-8")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
+# Thread pool for password hashing: the argon2/bcrypt C extensions release the GIL, so hashes run in parallel
+# without pickling or extra processes. Created on first use so forked workers get their own.
+# Sized from a per-worker memory budget (each Argon2id hash holds ARGON2_MEMORY_COST), not from the CPU
+# count, which can report the host's cores on small containers; further logins queue for a free thread.
+PASSWORD_HASH_MEMORY_BUDGET_KIB = int(os.getenv("PASSWORD_HASH_MEMORY_BUDGET_MB", "128")) * 1024
+PASSWORD_POOL_SIZE = int(os.getenv(
+    "PASSWORD_HASH_CONCURRENCY",
+    max(1, PASSWORD_HASH_MEMORY_BUDGET_KIB // ARGON2_MEMORY_COST),
+))
+_password_pool: Optional[ThreadPoolExecutor] = None
+
+# Hash of a random password, verified against when a login names an unknown user
+_dummy_password_hash: Optional[str] = None
+
 
 def hash_password(password: str) -> str:
     """
-    Hash a password using bcrypt
+    Hash a password using Argon2id
 
-    Bcrypt has a maximum password length of 72 bytes. We truncate the password
-    to 72 bytes to avoid errors, as recommended by bcrypt documentation.
+    Passwords are truncated to 72 bytes (the bcrypt limit) so hashing and
+    verification behave the same for legacy bcrypt hashes and new ones.
 
     Args:
         password: Plain text password
 
     Returns:
-        Bcrypt hashed password
+        Argon2id hashed password
     """
     # Convert to bytes to properly truncate at 72 bytes boundary
     password_bytes = password.encode('utf-8')
@@ -59,7 +93,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
     Args:
         plain_password: Plain text password
-        hashed_password: Bcrypt hashed password
+        hashed_password: Argon2id or legacy bcrypt hashed password
 
     Returns:
         True if password matches, False otherwise
@@ -81,6 +115,69 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return is_valid
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check whether a stored hash uses a deprecated scheme or outdated cost settings"""
+    return pwd_context.needs_update(hashed_password)
+
+
+def _get_password_pool() -> ThreadPoolExecutor:
+    """Get (or lazily create) the thread pool used for password hashing"""
+    global _password_pool
+    if _password_pool is None:
+        _password_pool = ThreadPoolExecutor(max_workers=PASSWORD_POOL_SIZE, thread_name_prefix="password-hash")
+    return _password_pool
+
+
+def shutdown_password_pool():
+    """Shut down the password hashing thread pool (called on app shutdown)"""
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=False, cancel_futures=True)
+        _password_pool = None
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password in the thread pool so hashing doesn't stall the event loop
+
+    Args:
+        password: Plain text password
+
+    Returns:
+        Argon2id hashed password
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password in the thread pool so hashing doesn't stall the event loop
+
+    Args:
+        plain_password: Plain text password
+        hashed_password: Argon2id or legacy bcrypt hashed password
+
+    Returns:
+        True if password matches, False otherwise
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_pool(), verify_password, plain_password, hashed_password)
+
+
+async def get_dummy_password_hash() -> str:
+    """
+    Get a password hash to verify against when the user doesn't exist
+
+    Running the same hashing work for unknown users keeps "user not found"
+    and "wrong password" indistinguishable by response time.
+    """
+    global _dummy_password_hash
+    if _dummy_password_hash is None:
+        _dummy_password_hash = await hash_password_async(secrets.token_urlsafe(16))
+    return _dummy_password_hash
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
     Create JWT access token
@@ -101,7 +198,7 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
 
     to_encode.update({"exp": expire, "type": "access"})
 
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=JWT_ALGORITHM)
     logger.debug(f"Access token created, expires at {expire}")
     return encoded_jwt
 
@@ -114,6 +211,10 @@ def create_refresh_token(data: Dict[str, Any], expires_delta: Optional[timedelta
         data: Payload data to encode (should include 'sub' for user ID)
         expires_delta: Optional custom expiration time
 
+    Each token carries a random `jti`, so tokens issued to the same user
+    within the same second are still distinct (the database stores them
+    under a unique fingerprint).
+
     Returns:
         JWT refresh token string
     """
@@ -124,9 +225,9 @@ def create_refresh_token(data: Dict[str, Any], expires_delta: Optional[timedelta
     else:
         expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
 
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": secrets.token_hex(16)})
 
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=JWT_ALGORITHM)
     logger.debug(f"Refresh token created, expires at {expire}")
     return encoded_jwt
 
@@ -142,13 +243,13 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
         Decoded payload if valid, None if invalid/expired
     """
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, _JWT_KEY, algorithms=JWT_ALGORITHMS)
         logger.debug("Token decoded successfully")
         return payload
     except jwt.ExpiredSignatureError:
         logger.warning("Token has expired")
         return None
-    except jwt.JWTError as e:
+    except jwt.InvalidTokenError as e:
         logger.error(f"JWT decode error: {e}")
         return None
 
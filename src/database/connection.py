@@ -4,6 +4,7 @@ Supports both SQLite (local) and PostgreSQL (production)
 """
 import os
 import logging
+import threading
 from pathlib import Path
 from contextlib import contextmanager
 
@@ -16,6 +17,7 @@ USE_POSTGRES = DATABASE_URL is not None
 if USE_POSTGRES:
     import psycopg2
     from psycopg2.extras import RealDictCursor
+    from psycopg2.pool import ThreadedConnectionPool
     logger.info("Using PostgreSQL database")
 else:
     import sqlite3
@@ -23,15 +25,64 @@ else:
     logger.info(f"Using SQLite database at: {DB_PATH}")
 
 
+# PostgreSQL connection pool: DB_POOL_MIN kept open, at most DB_POOL_MAX in use at once.
+# Every Gunicorn worker holds its own pool, so by default the server's connection budget
+# (DB_MAX_CONNECTIONS, below Postgres' max_connections of 100) is split across the workers
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "90"))
+_WEB_WORKERS = int(os.getenv("WEB_CONCURRENCY", 2 * (os.cpu_count() or 1) + 1))
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", max(2, DB_MAX_CONNECTIONS // _WEB_WORKERS)))
+
+# Created on first use per process (forked workers build their own); callers beyond
+# DB_POOL_MAX wait on the semaphore instead of getting a PoolError
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+
+
+def _get_pool():
+    """Get (or lazily create) this process's PostgreSQL connection pool"""
+    global _pool, _pool_pid
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DATABASE_URL)
+                _pool_pid = os.getpid()
+    return _pool
+
+
 @contextmanager
 def get_db():
     """Get database connection (context manager)"""
     if USE_POSTGRES:
-        conn = psycopg2.connect(DATABASE_URL)
+        # Reuse a pooled connection instead of connecting (and authenticating) per call
+        _pool_slots.acquire()
+        try:
+            pool = _get_pool()
+            conn = pool.getconn()
+            if conn.closed:
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+        except Exception:
+            _pool_slots.release()
+            raise
+
+        broken = False
         try:
             yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
         finally:
-            conn.close()
+            try:
+                # End any transaction left open by read-only callers before reuse
+                if not broken and not conn.closed:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+            pool.putconn(conn, close=broken or bool(conn.closed))
+            _pool_slots.release()
     else:
         DB_PATH.parent.mkdir(parents=True, exist_ok=True)
         conn = sqlite3.connect(str(DB_PATH))
@@ -86,6 +137,31 @@ def init_db():
                 CREATE INDEX IF NOT EXISTS idx_stories_user_id
                 ON stories(user_id)
             """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_stories_user_created
+                ON stories(user_id, created_at DESC, id DESC)
+            """)
+
+            # Audio generation task state, shared by all API workers
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tts_tasks (
+                    id VARCHAR(64) PRIMARY KEY,
+                    user_id INTEGER,
+                    story_id VARCHAR(255),
+                    status VARCHAR(20) NOT NULL,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    audio_url TEXT,
+                    error TEXT,
+                    duration REAL,
+                    created_at TIMESTAMP NOT NULL,
+                    updated_at TIMESTAMP NOT NULL,
+                    completed_at TIMESTAMP
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tts_tasks_created
+                ON tts_tasks(created_at)
+            """)
         else:
             # SQLite schema
             cursor.execute("""
@@ -118,6 +194,31 @@ def init_db():
                 CREATE INDEX IF NOT EXISTS idx_stories_user_id
                 ON stories(user_id)
             """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_stories_user_created
+                ON stories(user_id, created_at DESC, id DESC)
+            """)
+
+            # Audio generation task state, shared by all API workers
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tts_tasks (
+                    id TEXT PRIMARY KEY,
+                    user_id INTEGER,
+                    story_id TEXT,
+                    status TEXT NOT NULL,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    audio_url TEXT,
+                    error TEXT,
+                    duration REAL,
+                    created_at TIMESTAMP NOT NULL,
+                    updated_at TIMESTAMP NOT NULL,
+                    completed_at TIMESTAMP
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tts_tasks_created
+                ON tts_tasks(created_at)
+            """)
 
         conn.commit()
 
@@ -195,7 +195,7 @@ class Story:
         """Create Story from database row"""
         return cls(
             id=row['id'],
-            user_id=row.get('user_id'),
+            user_id=row['user_id'],
             title=row['title'] or '',
             text=row['text'],
             theme=row['theme'],
@@ -1,6 +1,11 @@
 """
 Refresh Token Service - Database operations for JWT refresh token rotation
+
+Tokens are stored and looked up by their SHA-256 fingerprint (hex), never
+as the raw JWT: the indexed column stays small and fixed-width, and a
+database leak does not expose usable refresh tokens.
 """
+import hashlib
 import logging
 from typing import Optional
 from datetime import datetime, timedelta
@@ -18,6 +23,11 @@ def _format_query(query: str) -> str:
     return query
 
 
+def fingerprint(token: str) -> str:
+    """SHA-256 fingerprint of a refresh token, as stored in refresh_tokens.token"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 def create_refresh_token(user_id: int, token: str, expires_days: int = 7) -> Optional[RefreshToken]:
     """
     Create a new refresh token
@@ -36,20 +46,28 @@ def create_refresh_token(user_id: int, token: str, expires_days: int = 7) -> Opt
         with get_db() as conn:
             cursor = get_cursor(conn)
 
-            cursor.execute(_format_query("""
-                INSERT INTO refresh_tokens (user_id, token, expires_at)
-                VALUES (?, ?, ?)
-            """), (user_id, token, expires_at.isoformat()))
-
-            token_id = cursor.lastrowid
-            cursor.execute(_format_query("SELECT * FROM refresh_tokens WHERE id = ?"), (token_id,))
-            row = cursor.fetchone()
+            if USE_POSTGRES:
+                # Insert and read back in one statement (psycopg2 has no lastrowid for SERIAL ids)
+                cursor.execute("""
+                    INSERT INTO refresh_tokens (user_id, token, expires_at)
+                    VALUES (%s, %s, %s)
+                    RETURNING *
+                """, (user_id, fingerprint(token), expires_at.isoformat()))
+                row = cursor.fetchone()
+            else:
+                cursor.execute("""
+                    INSERT INTO refresh_tokens (user_id, token, expires_at)
+                    VALUES (?, ?, ?)
+                """, (user_id, fingerprint(token), expires_at.isoformat()))
+                token_id = cursor.lastrowid
+                cursor.execute("SELECT * FROM refresh_tokens WHERE id = ?", (token_id,))
+                row = cursor.fetchone()
 
             conn.commit()
 
             if row:
                 refresh_token = RefreshToken.from_db_row(row)
-                logger.info(f"Created refresh token for user {user_id}")
+                logger.debug(f"Created refresh token for user {user_id}")
                 return refresh_token
 
             return None
@@ -63,7 +81,7 @@ def get_refresh_token(token: str) -> Optional[RefreshToken]:
     try:
         with get_db() as conn:
             cursor = get_cursor(conn)
-            cursor.execute(_format_query("SELECT * FROM refresh_tokens WHERE token = ?"), (token,))
+            cursor.execute(_format_query("SELECT * FROM refresh_tokens WHERE token = ?"), (fingerprint(token),))
             row = cursor.fetchone()
 
             if row:
@@ -124,19 +142,82 @@ def revoke_token(token: str) -> bool:
                 UPDATE refresh_tokens
                 SET is_revoked = 1, revoked_at = CURRENT_TIMESTAMP
                 WHERE token = ?
-            """), (token,))
+            """), (fingerprint(token),))
 
             conn.commit()
 
             revoked = cursor.rowcount > 0
             if revoked:
-                logger.info("Revoked refresh token")
+                logger.debug("Revoked refresh token")
             return revoked
     except Exception as e:
         logger.error(f"Failed to revoke token: {e}")
         return False
 
 
+def rotate_token(old_token: str, user_id: int, new_token: str, expires_days: int = 7) -> bool:
+    """
+    Atomically revoke an old refresh token and store its replacement
+
+    The old token is only revoked if it belongs to the user and is still
+    valid (not revoked, not expired), and the new token is only stored if
+    that revocation happened - so validation, revocation and insertion take
+    a single round trip, and a token replayed concurrently rotates at most once.
+    On PostgreSQL this is one statement (data-modifying CTE); on SQLite both
+    statements share one connection and commit.
+
+    Args:
+        old_token: Refresh token being replaced
+        user_id: User ID owning both tokens
+        new_token: New refresh token string
+        expires_days: Days until the new token expires (default 7)
+
+    Returns:
+        True if the old token was valid and the new one was stored, False otherwise
+    """
+    try:
+        now = datetime.now()
+        expires_at = now + timedelta(days=expires_days)
+
+        with get_db() as conn:
+            cursor = get_cursor(conn)
+
+            if USE_POSTGRES:
+                cursor.execute("""
+                    WITH revoked AS (
+                        UPDATE refresh_tokens
+                        SET is_revoked = TRUE, revoked_at = CURRENT_TIMESTAMP
+                        WHERE token = %s AND user_id = %s AND is_revoked = FALSE AND expires_at > %s
+                        RETURNING user_id
+                    )
+                    INSERT INTO refresh_tokens (user_id, token, expires_at)
+                    SELECT user_id, %s, %s FROM revoked
+                """, (fingerprint(old_token), user_id, now.isoformat(), fingerprint(new_token), expires_at.isoformat()))
+                rotated = cursor.rowcount == 1
+            else:
+                cursor.execute("""
+                    UPDATE refresh_tokens
+                    SET is_revoked = 1, revoked_at = CURRENT_TIMESTAMP
+                    WHERE token = ? AND user_id = ? AND is_revoked = 0 AND expires_at > ?
+                """, (fingerprint(old_token), user_id, now.isoformat()))
+                rotated = cursor.rowcount == 1
+                if rotated:
+                    cursor.execute("""
+                        INSERT INTO refresh_tokens (user_id, token, expires_at)
+                        VALUES (?, ?, ?)
+                    """, (user_id, fingerprint(new_token), expires_at.isoformat()))
+
+            conn.commit()
+            if rotated:
+                logger.debug(f"Rotated refresh token for user {user_id}")
+            else:
+                logger.warning(f"Refresh token for user {user_id} is invalid, revoked or expired")
+            return rotated
+    except Exception as e:
+        logger.error(f"Failed to rotate refresh token for user {user_id}: {e}")
+        return False
+
+
 def revoke_user_tokens(user_id: int) -> int:
     """
     Revoke all refresh tokens for a user
@@ -5,6 +5,8 @@ from typing import List, Optional, Dict
 import uuid
 import json
 import logging
+import os
+import time
 from datetime import datetime
 from .connection import get_db, get_cursor, USE_POSTGRES
 from .models import Story
@@ -23,6 +25,41 @@ THEME_COLORS = {
 }
 
 
+# Columns the story list can be ordered by (interpolated into ORDER BY, so whitelisted)
+SORTABLE_COLUMNS = frozenset({"created_at", "updated_at", "title", "word_count"})
+
+# List view columns: everything except the full story text
+LIST_COLUMNS = (
+    "id, user_id, title, theme, style, tone, length, word_count, thumbnail_color, "
+    "preview_text, created_at, updated_at, audio_url, metadata"
+)
+
+
+def _list_item(row) -> Dict:
+    """Build a story list entry from a LIST_COLUMNS row"""
+    def to_str(value):
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value) if value else value
+
+    return {
+        'id': row['id'],
+        'user_id': row['user_id'],
+        'title': row['title'] or '',
+        'theme': row['theme'],
+        'style': row['style'],
+        'tone': row['tone'],
+        'length': row['length'],
+        'word_count': row['word_count'],
+        'thumbnail_color': row['thumbnail_color'] or '',
+        'text_preview': row['preview_text'] or '',
+        'created_at': to_str(row['created_at']),
+        'updated_at': to_str(row['updated_at']),
+        'audio_url': row['audio_url'],
+        'metadata': json.loads(row['metadata']) if row['metadata'] else None
+    }
+
+
 def get_placeholder():
     """Get SQL parameter placeholder based on database type"""
     return "%s" if USE_POSTGRES else "?"
@@ -31,6 +68,26 @@ def get_placeholder():
 class StoryService:
     """Service for story database operations"""
 
+    @staticmethod
+    def generate_id() -> str:
+        """
+        Generate a time-ordered story ID (UUIDv7)
+
+        The leading 48 bits are the Unix time in milliseconds, so new IDs sort
+        after older ones and inserts land at the right edge of the primary key
+        index instead of at random positions.
+        """
+        timestamp_ms = time.time_ns() // 1_000_000
+        rand = int.from_bytes(os.urandom(10), "big")
+        value = (
+            (timestamp_ms & 0xFFFFFFFFFFFF) << 80
+            | 0x7 << 76                       # version 7
+            | (rand >> 68) << 64              # 12 random bits
+            | 0b10 << 62                      # RFC 4122 variant
+            | rand & 0x3FFFFFFFFFFFFFFF       # 62 random bits
+        )
+        return str(uuid.UUID(int=value))
+
     @staticmethod
     def generate_title(text: str, theme: str) -> str:
         """Generate a title from story text and theme"""
@@ -83,7 +140,7 @@ class StoryService:
             length: Story length
             word_count: Number of words
             user_id: User ID who owns this story
-            story_id: Optional custom ID (generates UUID if not provided)
+            story_id: Optional custom ID (generates a UUIDv7 if not provided)
             audio_url: Optional audio file URL
             metadata: Optional metadata dict
 
@@ -92,7 +149,7 @@ class StoryService:
         """
         # Generate values
         if story_id is None:
-            story_id = str(uuid.uuid4())
+            story_id = StoryService.generate_id()
 
         title = StoryService.generate_title(text, theme)
         preview_text = StoryService.generate_preview(text)
@@ -136,13 +193,26 @@ class StoryService:
         )
 
     @staticmethod
-    def get_story(story_id: str) -> Optional[Story]:
-        """Get story by ID"""
+    def get_story(story_id: str, user_id: Optional[int] = None) -> Optional[Story]:
+        """
+        Get story by ID
+
+        Args:
+            story_id: Story ID
+            user_id: If provided, only return the story when this user owns it
+                     (checked in the WHERE clause, so other users' rows are never fetched)
+
+        Returns:
+            Story if found (and owned by user_id, when given), None otherwise
+        """
         try:
             ph = get_placeholder()
             with get_db() as conn:
                 cursor = get_cursor(conn)
-                cursor.execute(f"SELECT * FROM stories WHERE id = {ph}", (story_id,))
+                if user_id is None:
+                    cursor.execute(f"SELECT * FROM stories WHERE id = {ph}", (story_id,))
+                else:
+                    cursor.execute(f"SELECT * FROM stories WHERE id = {ph} AND user_id = {ph}", (story_id, user_id))
                 row = cursor.fetchone()
 
             if row:
@@ -161,54 +231,76 @@ class StoryService:
         limit: int = 20,
         offset: int = 0,
         sort_by: str = "created_at",
-        order: str = "DESC"
+        order: str = "DESC",
+        after: Optional[str] = None
     ) -> Dict:
         """
         List stories with pagination
 
+        Only the columns shown in the list view are selected (no full text).
+        When sorting by created_at, pass the previous page's `next_cursor` as
+        `after` to page by key instead of OFFSET.
+
         Args:
             user_id: Filter by user ID (if provided, only returns user's stories)
             limit: Number of stories per page
-            offset: Number of stories to skip
-            sort_by: Column to sort by
+            offset: Number of stories to skip (ignored when `after` is given)
+            sort_by: Column to sort by (one of SORTABLE_COLUMNS)
             order: Sort order (ASC or DESC)
+            after: Keyset cursor from a previous page's `next_cursor`
 
         Returns:
-            Dictionary with stories list and total count
+            Dictionary with stories list, total count and next_cursor
         """
+        if sort_by not in SORTABLE_COLUMNS:
+            sort_by = "created_at"
+        order = "ASC" if order.upper() == "ASC" else "DESC"
+        keyset = sort_by == "created_at"
+
         ph = get_placeholder()
         with get_db() as conn:
             cursor = get_cursor(conn)
 
             # Build WHERE clause for user filtering
-            where_clause = ""
+            conditions = []
             count_params = []
             if user_id is not None:
-                where_clause = f"WHERE user_id = {ph}"
+                conditions.append(f"user_id = {ph}")
                 count_params.append(user_id)
 
             # Get total count
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
             cursor.execute(f"SELECT COUNT(*) as count FROM stories {where_clause}", count_params)
             total = cursor.fetchone()['count']
 
-            # Get stories (DISTINCT to prevent duplicates)
+            query_params = list(count_params)
+            if keyset and after:
+                created_at, _, story_id = after.partition("|")
+                conditions.append(f"(created_at, id) {'<' if order == 'DESC' else '>'} ({ph}, {ph})")
+                query_params += [created_at, story_id]
+                offset = 0
+
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
             query = f"""
-                SELECT DISTINCT * FROM stories
+                SELECT {LIST_COLUMNS} FROM stories
                 {where_clause}
-                ORDER BY {sort_by} {order}
+                ORDER BY {sort_by} {order}, id {order}
                 LIMIT {ph} OFFSET {ph}
             """
-            query_params = count_params + [limit, offset]
+            query_params += [limit, offset]
             cursor.execute(query, query_params)
             rows = cursor.fetchall()
 
-            stories = [Story.from_db_row(row) for row in rows]
+        next_cursor = None
+        if keyset and len(rows) == limit:
+            next_cursor = f"{rows[-1]['created_at']}|{rows[-1]['id']}"
 
         return {
-            "stories": [s.to_dict() for s in stories],
+            "stories": [_list_item(row) for row in rows],
             "total": total,
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": next_cursor
         }
 
     @staticmethod
@@ -216,7 +308,9 @@ class StoryService:
         story_id: str,
         text: Optional[str] = None,
         audio_url: Optional[str] = None,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        word_count: Optional[int] = None,
+        user_id: Optional[int] = None
     ) -> Optional[Story]:
         """
         Update story fields
@@ -226,15 +320,13 @@ class StoryService:
             text: New text (optional)
             audio_url: New audio URL (optional)
             metadata: New metadata (optional)
+            word_count: Word count of text, if the caller already counted it (optional)
+            user_id: If provided, only update the story when this user owns it
+                     (checked in the UPDATE's WHERE clause)
 
         Returns:
-            Updated Story object or None if not found
+            Updated Story object or None if not found (or not owned by user_id)
         """
-        # Get existing story
-        story = StoryService.get_story(story_id)
-        if not story:
-            return None
-
         # Build update query
         updates = []
         params = []
@@ -244,7 +336,7 @@ class StoryService:
             updates.append(f"text = {ph}")
             params.append(text)
             updates.append(f"word_count = {ph}")
-            params.append(len(text.split()))
+            params.append(word_count if word_count is not None else len(text.split()))
             updates.append(f"preview_text = {ph}")
             params.append(StoryService.generate_preview(text))
 
@@ -259,16 +351,26 @@ class StoryService:
         updates.append(f"updated_at = {ph}")
         params.append(datetime.now().isoformat())
 
+        query = f"UPDATE stories SET {', '.join(updates)} WHERE id = {ph}"
         params.append(story_id)
+        if user_id is not None:
+            query += f" AND user_id = {ph}"
+            params.append(user_id)
 
-        query = f"UPDATE stories SET {', '.join(updates)} WHERE id = {ph}"
+        # One statement finds, checks and updates the row; PostgreSQL also returns it
+        if USE_POSTGRES:
+            query += " RETURNING *"
         with get_db() as conn:
             cursor = get_cursor(conn)
             cursor.execute(query, params)
+            row = cursor.fetchone() if USE_POSTGRES else None
+            updated = cursor.rowcount > 0
             conn.commit()
+        if not updated:
+            return None
 
         # Return updated story
-        return StoryService.get_story(story_id)
+        return Story.from_db_row(row) if row else StoryService.get_story(story_id)
 
     @staticmethod
     def delete_story(story_id: str, user_id: Optional[int] = None) -> bool:
@@ -282,16 +384,14 @@ class StoryService:
         Returns:
             True if deleted, False if not found or not owned by user
         """
-        # Ownership check if user_id provided
-        if user_id is not None:
-            story = StoryService.get_story(story_id)
-            if not story or story.user_id != user_id:
-                return False
-
         ph = get_placeholder()
         with get_db() as conn:
             cursor = get_cursor(conn)
-            cursor.execute(f"DELETE FROM stories WHERE id = {ph}", (story_id,))
+            # Ownership check in the same statement when user_id is provided
+            if user_id is None:
+                cursor.execute(f"DELETE FROM stories WHERE id = {ph}", (story_id,))
+            else:
+                cursor.execute(f"DELETE FROM stories WHERE id = {ph} AND user_id = {ph}", (story_id, user_id))
             deleted = cursor.rowcount > 0
             conn.commit()
 
@@ -309,7 +409,4 @@ class StoryService:
         Returns:
             Story if found and owned by user, None otherwise
         """
-        story = StoryService.get_story(story_id)
-        if story and story.user_id == user_id:
-            return story
-        return None
+        return StoryService.get_story(story_id, user_id=user_id)
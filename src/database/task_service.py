@@ -0,0 +1,134 @@
+"""
+TTS Task Service - Database-backed state for audio generation tasks
+
+Task status lives in the database instead of a per-process dict, so any API
+worker can answer /tts/status for a task started on another worker. The job
+itself runs in that worker's thread pool and dies with it: every update
+stamps updated_at, and a processing task with no update for
+TASK_STALE_SECONDS is reported (and recorded) as failed. Queued tasks are
+left alone, since they may legitimately wait behind other narrations. A
+failed task is final: later updates from its job are ignored. Rows older
+than TASK_TTL_HOURS are purged when new tasks are created.
+"""
+import os
+import logging
+from typing import Dict, Optional
+from datetime import datetime, timedelta
+
+from .connection import get_db, get_cursor, USE_POSTGRES
+
+logger = logging.getLogger(__name__)
+
+TASK_TTL_HOURS = int(os.getenv("TTS_TASK_TTL_HOURS", "24"))
+TASK_STALE_SECONDS = int(os.getenv("TTS_TASK_STALE_SECONDS", "1800"))
+INTERRUPTED_ERROR = "Task was interrupted (server restarted); please try again"
+
+# Columns update_task may set (names are interpolated into SQL, values are not)
+UPDATABLE_FIELDS = frozenset({"status", "progress", "audio_url", "error", "duration", "completed_at"})
+
+
+def _format_query(query: str) -> str:
+    """Convert SQL query placeholders for PostgreSQL compatibility"""
+    if USE_POSTGRES:
+        return query.replace('?', '%s')
+    return query
+
+
+def create_task(task_id: str, story_id: Optional[str], user_id: Optional[int]) -> bool:
+    """
+    Record a new queued task (and purge expired ones)
+
+    Returns:
+        True if created, False otherwise
+    """
+    try:
+        now = datetime.now()
+        with get_db() as conn:
+            cursor = get_cursor(conn)
+            cursor.execute(
+                _format_query("DELETE FROM tts_tasks WHERE created_at < ?"),
+                ((now - timedelta(hours=TASK_TTL_HOURS)).isoformat(),)
+            )
+            cursor.execute(_format_query("""
+                INSERT INTO tts_tasks (id, user_id, story_id, status, progress, created_at, updated_at)
+                VALUES (?, ?, ?, 'queued', 0, ?, ?)
+            """), (task_id, user_id, story_id, now.isoformat(), now.isoformat()))
+            conn.commit()
+            return True
+    except Exception as e:
+        logger.error(f"Failed to create task {task_id}: {e}")
+        return False
+
+
+def update_task(task_id: str, **fields) -> bool:
+    """
+    Update a task's status fields (status, progress, audio_url, error, duration, completed_at)
+
+    Tasks already marked failed are not updated.
+
+    Returns:
+        True if a task was updated, False otherwise (missing, failed, or error)
+    """
+    unknown = set(fields) - UPDATABLE_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown task fields: {', '.join(sorted(unknown))}")
+    if not fields:
+        return False
+
+    try:
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with get_db() as conn:
+            cursor = get_cursor(conn)
+            cursor.execute(
+                _format_query(f"UPDATE tts_tasks SET {assignments}, updated_at = ? WHERE id = ? AND status != 'failed'"),
+                (*fields.values(), datetime.now().isoformat(), task_id)
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+    except Exception as e:
+        logger.error(f"Failed to update task {task_id}: {e}")
+        return False
+
+
+def _is_stale(task: Dict) -> bool:
+    """True if a processing task hasn't been updated within TASK_STALE_SECONDS"""
+    if task["status"] != "processing":
+        return False
+    updated_at = task["updated_at"]
+    if isinstance(updated_at, str):
+        updated_at = datetime.fromisoformat(updated_at)
+    return datetime.now() - updated_at > timedelta(seconds=TASK_STALE_SECONDS)
+
+
+def get_task(task_id: str) -> Optional[Dict]:
+    """
+    Get a task's state as a dict, or None if it doesn't exist
+
+    A processing task whose worker stopped updating it is marked failed first.
+    """
+    try:
+        with get_db() as conn:
+            cursor = get_cursor(conn)
+            cursor.execute(_format_query("SELECT * FROM tts_tasks WHERE id = ?"), (task_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+            task = dict(row)
+            if _is_stale(task):
+                # Only if untouched since the SELECT, in case the job updated it meanwhile
+                cursor.execute(_format_query("""
+                    UPDATE tts_tasks SET status = 'failed', progress = 0, error = ?
+                    WHERE id = ? AND updated_at = ?
+                """), (INTERRUPTED_ERROR, task_id, task["updated_at"]))
+                conn.commit()
+                if cursor.rowcount:
+                    logger.warning(f"Task {task_id} was interrupted; marked as failed")
+                    task.update(status="failed", progress=0, error=INTERRUPTED_ERROR)
+                else:
+                    cursor.execute(_format_query("SELECT * FROM tts_tasks WHERE id = ?"), (task_id,))
+                    task = dict(cursor.fetchone())
+            return task
+    except Exception as e:
+        logger.error(f"Failed to get task {task_id}: {e}")
+        return None
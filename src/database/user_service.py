@@ -112,11 +112,37 @@ def get_user_by_email(email: str) -> Optional[User]:
         return None
 
 
+def get_user_by_username_or_email(identifier: str) -> Optional[User]:
+    """
+    Get user by username or email in a single query
+
+    A username match wins over an email match, as with looking up by
+    username first and falling back to email.
+    """
+    try:
+        with get_db() as conn:
+            cursor = get_cursor(conn)
+            cursor.execute(_format_query("""
+                SELECT * FROM users
+                WHERE username = ? OR email = ?
+                ORDER BY CASE WHEN username = ? THEN 0 ELSE 1 END
+                LIMIT 1
+            """), (identifier, identifier, identifier))
+            row = cursor.fetchone()
+
+            if row:
+                return User.from_db_row(row)
+            return None
+    except Exception as e:
+        logger.error(f"Failed to get user by username or email {identifier}: {e}")
+        return None
+
+
 def authenticate_user(username: str, password_hash: str) -> Optional[User]:
     """
     Authenticate user by username and password hash
 
-    Note: Password verification should be done with bcrypt in the auth layer.
+    Note: Password verification should be done in the auth layer (auth.security).
     This method retrieves the user for password verification.
 
     Args:
@@ -129,17 +155,33 @@ def authenticate_user(username: str, password_hash: str) -> Optional[User]:
     return get_user_by_username(username)
 
 
-def update_last_login(user_id: int) -> bool:
-    """Update user's last login timestamp"""
+def update_last_login(user_id: int, password_hash: Optional[str] = None) -> bool:
+    """
+    Update user's last login timestamp
+
+    Args:
+        user_id: User ID
+        password_hash: Optional upgraded password hash, written in the same statement
+
+    Returns:
+        True if the user was updated, False otherwise
+    """
     try:
         with get_db() as conn:
             cursor = get_cursor(conn)
 
-            cursor.execute(_format_query("""
-                UPDATE users
-                SET last_login = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """), (user_id,))
+            if password_hash:
+                cursor.execute(_format_query("""
+                    UPDATE users
+                    SET last_login = CURRENT_TIMESTAMP, password_hash = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """), (password_hash, user_id))
+            else:
+                cursor.execute(_format_query("""
+                    UPDATE users
+                    SET last_login = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """), (user_id,))
 
             conn.commit()
             return cursor.rowcount > 0
@@ -233,6 +275,36 @@ def delete_user(user_id: int) -> bool:
         return False
 
 
+def check_conflicts(username: str, email: str) -> Optional[str]:
+    """
+    Check in one query whether a username or email is already taken
+
+    Args:
+        username: Username to check
+        email: Email to check
+
+    Returns:
+        "username" or "email" for the field already in use (username first), None if both are free
+    """
+    try:
+        with get_db() as conn:
+            cursor = get_cursor(conn)
+            cursor.execute(_format_query("""
+                SELECT username, email FROM users
+                WHERE username = ? OR email = ?
+                ORDER BY CASE WHEN username = ? THEN 0 ELSE 1 END
+                LIMIT 1
+            """), (username, email, username))
+            row = cursor.fetchone()
+
+            if not row:
+                return None
+            return "username" if row['username'] == username else "email"
+    except Exception as e:
+        logger.error(f"Failed to check conflicts for {username}/{email}: {e}")
+        return None
+
+
 def user_exists(username: Optional[str] = None, email: Optional[str] = None) -> bool:
     """
     Check if user exists by username or email
@@ -1,17 +1,28 @@
 """
 Story Narrator - AI-powered story generation and voice cloning system
 """
+import importlib
+import importlib.util
 
 from .story_generator import StoryGenerator, StoryPrompt
 from .text_processor import TextProcessor
 
-# AudioSynthesizer and StoryNarrator require torch - make them optional
-try:
-    from .audio_synthesizer import AudioSynthesizer
-    from .narrator import StoryNarrator
-    _has_audio = True
-except ImportError:
-    _has_audio = False
+# AudioSynthesizer and StoryNarrator require torch - make them optional, and import them
+# on first access so importing the package (e.g. for TextProcessor) doesn't load torch
+_has_audio = importlib.util.find_spec("torch") is not None
+_LAZY_AUDIO = {
+    "AudioSynthesizer": ".audio_synthesizer",
+    "StoryNarrator": ".narrator",
+}
+
+
+def __getattr__(name):
+    if _has_audio and name in _LAZY_AUDIO:
+        value = getattr(importlib.import_module(_LAZY_AUDIO[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # RunPodTTSClient is optional
 try:
@@ -5,6 +5,7 @@ Handles remote synthesis via RunPod serverless endpoint
 import os
 import base64
 import time
+from functools import lru_cache
 import requests
 from pathlib import Path
 from dotenv import load_dotenv
@@ -13,6 +14,19 @@ from .logger import setup_logger
 load_dotenv()
 logger = setup_logger(__name__)
 
+@lru_cache(maxsize=32)
+def _read_voice_b64(path: str, mtime_ns: int, size: int) -> str:
+    """Base64 of a voice sample; cached per file version (mtime/size are part of the key)"""
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode('utf-8')
+
+
+def encode_voice_sample(voice_sample_path: str) -> str:
+    """Base64-encode a voice sample, reusing the encoding while the file is unchanged"""
+    stat = os.stat(voice_sample_path)
+    return _read_voice_b64(str(voice_sample_path), stat.st_mtime_ns, stat.st_size)
+
+
 class RunPodTTSClient:
     def __init__(self):
         self.api_key = os.getenv("RUNPOD_API_KEY")
@@ -51,9 +65,8 @@ class RunPodTTSClient:
         Returns:
             bytes: WAV audio data
         """
-        # Read and encode voice sample
-        with open(voice_sample_path, "rb") as f:
-            voice_b64 = base64.b64encode(f.read()).decode('utf-8')
+        # Read and encode voice sample (once per file version, not once per chunk)
+        voice_b64 = encode_voice_sample(voice_sample_path)
         
         # Prepare RunPod request with all TTS parameters
         request_payload = {
@@ -91,17 +104,12 @@ class RunPodTTSClient:
             status = result.get('status', 'UNKNOWN')
 
             if status == 'COMPLETED':
-                output = result.get('output', {})
-
-                # Get audio from output
-                if "audio_b64" in output:
-                    audio_bytes = base64.b64decode(output["audio_b64"])
-                    exec_time = result.get('executionTime', 0) / 1000  # Convert ms to seconds
-                    delay_time = result.get('delayTime', 0) / 1000
-                    logger.info(f"Job completed! Audio: {len(audio_bytes)} bytes (exec: {exec_time:.1f}s, wait: {delay_time:.1f}s)")
-                    return audio_bytes
-                else:
-                    raise RuntimeError(f"No audio_b64 in output. Output keys: {list(output.keys())}")
+                audio_bytes = self._audio_from_output(result.get('output', {}))
+
+                exec_time = result.get('executionTime', 0) / 1000  # Convert ms to seconds
+                delay_time = result.get('delayTime', 0) / 1000
+                logger.info(f"Job completed! Audio: {len(audio_bytes)} bytes (exec: {exec_time:.1f}s, wait: {delay_time:.1f}s)")
+                return audio_bytes
 
             elif status == 'FAILED':
                 error_msg = result.get('error', 'Unknown error')
@@ -118,6 +126,34 @@ class RunPodTTSClient:
             logger.error(f"RunPod synthesis failed: {e}")
             raise
     
+    def _audio_from_output(self, output):
+        """
+        Extract WAV bytes from a completed job's output
+
+        The worker streams its results, so `output` is the aggregated list of
+        yielded items: an `audio_url` item when a bucket is configured,
+        otherwise `chunk_b64` slices ordered by `seq`. A single dict with
+        `audio_b64` is still accepted from older workers.
+        """
+        items = output if isinstance(output, list) else [output]
+
+        for item in items:
+            if "error" in item:
+                raise RuntimeError(f"Job failed: {item['error']}")
+
+        for item in items:
+            if "audio_url" in item:
+                audio_response = requests.get(item["audio_url"], timeout=300)
+                audio_response.raise_for_status()
+                return audio_response.content
+            if "audio_b64" in item:
+                return base64.b64decode(item["audio_b64"])
+
+        chunks = sorted((item for item in items if "chunk_b64" in item), key=lambda item: item["seq"])
+        if not chunks:
+            raise RuntimeError(f"No audio in output: {[list(item.keys()) for item in items]}")
+        return b"".join(base64.b64decode(item["chunk_b64"]) for item in chunks)
+
     def synthesize_chunks(
         self,
         chunks: list,
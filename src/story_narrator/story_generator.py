@@ -2,8 +2,10 @@
 Story Generator Module - Uses LLM to create stories based on user prompts
 """
 
+import asyncio
 import os
-from typing import Dict, Optional, List
+import threading
+from typing import AsyncIterator, Dict, Optional, List
 from dataclasses import dataclass
 import json
 from .logger import setup_logger
@@ -17,6 +19,52 @@ except ImportError:
 
 logger = setup_logger(__name__)
 
+# Gemini safety settings (less restrictive, shared by all story prompts)
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+]
+
+# Generation settings for stories, and for the retry after content was filtered
+STORY_GENERATION_CONFIG = {"temperature": 0.8, "max_output_tokens": 3000}
+RETRY_GENERATION_CONFIG = {"temperature": 0.5, "max_output_tokens": 3000}
+
+
+# Story prompt, built once: the header is called with theme/style/tone/word_count,
+# optional additional details follow, then the fixed requirements
+STORY_PROMPT_HEADER = """You are a creative storyteller for children. Generate an engaging story based on the following requirements:
+
+**Theme:** {theme}
+**Style:** {style}
+**Tone:** {tone}
+**Target Audience:** Children aged 10 years old
+**Target Length:** Approximately {word_count} words
+
+""".format
+
+STORY_PROMPT_REQUIREMENTS = """
+**IMPORTANT Language Requirements:**
+1. Use VERY SIMPLE language that a 10-year-old child can easily understand
+2. Use SHORT sentences (10-15 words maximum)
+3. Use COMMON, everyday words - avoid complex vocabulary
+4. NO idioms, metaphors, or abstract concepts
+5. Use concrete, visual descriptions that children can imagine
+6. Use simple dialogue with easy words
+7. Keep paragraphs SHORT (3-4 sentences maximum)
+
+**Story Requirements:**
+1. Create a complete story with a clear beginning, middle, and end
+2. Use vivid but SIMPLE descriptions
+3. Include fun dialogue that children would use
+4. Make it exciting and easy to follow
+5. Ensure the story is suitable for audio narration (avoid special characters, lists, or complex formatting)
+6. Use repetition and patterns that help children follow along
+7. Keep the vocabulary at a 4th-5th grade reading level
+
+Generate the story now using ONLY simple words and short sentences:"""
+
 
 @dataclass
 class StoryPrompt:
@@ -81,6 +129,8 @@ class StoryGenerator:
         }.get(self.provider, "gemini-2.5-flash")
         
         self._client = None
+        # GenerativeModel instances by (system_instruction, uses safety settings)
+        self._models = {}
         self._initialize_client()
     
     def _initialize_client(self):
@@ -97,45 +147,48 @@ class StoryGenerator:
         else:
             raise ValueError(f"Unsupported provider: {self.provider}")
     
+    def gemini_model(self, system_instruction: str, safety_settings: Optional[List[Dict]] = None):
+        """
+        Get a Gemini GenerativeModel for a system instruction, built once and reused
+
+        Args:
+            system_instruction: System prompt for the model
+            safety_settings: Optional safety settings (e.g. SAFETY_SETTINGS)
+
+        Returns:
+            Cached google.generativeai GenerativeModel
+        """
+        # Keyed on the settings' content, so different settings never share a model
+        settings_key = (
+            tuple(tuple(sorted(setting.items())) for setting in safety_settings)
+            if safety_settings is not None else None
+        )
+        key = (system_instruction, settings_key)
+        model = self._models.get(key)
+        if model is None:
+            model = self._client.GenerativeModel(
+                model_name=self.model,
+                system_instruction=system_instruction,
+                safety_settings=safety_settings
+            )
+            self._models[key] = model
+        return model
+
     def _build_prompt(self, story_prompt: StoryPrompt) -> str:
         """Build the LLM prompt for story generation"""
         word_count = self.WORD_COUNT_MAP.get(story_prompt.length, 1000)
 
-        prompt = f"""You are a creative storyteller for children. Generate an engaging story based on the following requirements:
-
-**Theme:** {story_prompt.theme}
-**Style:** {story_prompt.style}
-**Tone:** {story_prompt.tone}
-**Target Audience:** Children aged 10 years old
-**Target Length:** Approximately {word_count} words
-
-"""
+        prompt = STORY_PROMPT_HEADER(
+            theme=story_prompt.theme,
+            style=story_prompt.style,
+            tone=story_prompt.tone,
+            word_count=word_count,
+        )
 
         if story_prompt.additional_details:
             prompt += f"**Additional Details:** {story_prompt.additional_details}\n\n"
 
-        prompt += """
-**IMPORTANT Language Requirements:**
-1. Use VERY SIMPLE language that a 10-year-old child can easily understand
-2. Use SHORT sentences (10-15 words maximum)
-3. Use COMMON, everyday words - avoid complex vocabulary
-4. NO idioms, metaphors, or abstract concepts
-5. Use concrete, visual descriptions that children can imagine
-6. Use simple dialogue with easy words
-7. Keep paragraphs SHORT (3-4 sentences maximum)
-
-**Story Requirements:**
-1. Create a complete story with a clear beginning, middle, and end
-2. Use vivid but SIMPLE descriptions
-3. Include fun dialogue that children would use
-4. Make it exciting and easy to follow
-5. Ensure the story is suitable for audio narration (avoid special characters, lists, or complex formatting)
-6. Use repetition and patterns that help children follow along
-7. Keep the vocabulary at a 4th-5th grade reading level
-
-Generate the story now using ONLY simple words and short sentences:"""
-
-        return prompt
+        return prompt + STORY_PROMPT_REQUIREMENTS
     
     def generate_story(self, story_prompt: StoryPrompt) -> Dict:
         """
@@ -163,42 +216,93 @@ Generate the story now using ONLY simple words and short sentences:"""
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}")
             
-            return {
-                "story": story_text.strip(),
-                "metadata": {
-                    "provider": self.provider,
-                    "model": self.model,
-                    "prompt_config": story_prompt.to_dict(),
-                    "prompt_used": prompt
-                }
-            }
+            return self._story_result(story_text, story_prompt, prompt)
         
         except Exception as e:
             raise Exception(f"Error generating story with {self.provider}: {str(e)}")
+
+    async def generate_story_async(self, story_prompt: StoryPrompt) -> Dict:
+        """
+        Generate a story without blocking the event loop
+
+        Gemini requests are awaited on the async client, so concurrent
+        callers overlap their requests; other providers run generate_story
+        in a worker thread.
+
+        Args:
+            story_prompt: StoryPrompt object with generation parameters
+
+        Returns:
+            Same dictionary as generate_story
+        """
+        if self.provider != "gemini":
+            return await asyncio.to_thread(self.generate_story, story_prompt)
+
+        prompt = self._build_prompt(story_prompt)
+
+        try:
+            story_text = await self._generate_gemini_async(prompt)
+            return self._story_result(story_text, story_prompt, prompt)
+
+        except Exception as e:
+            raise Exception(f"Error generating story with {self.provider}: {str(e)}")
+
+    async def stream_story_async(self, story_prompt: StoryPrompt) -> AsyncIterator[str]:
+        """
+        Stream a story's text from Gemini as it is generated
+
+        Unlike generate_story there is no retry when content is filtered, since
+        part of the story may already have been sent.
+
+        Args:
+            story_prompt: StoryPrompt object with generation parameters
+
+        Yields:
+            Chunks of story text
+        """
+        if self.provider != "gemini":
+            raise ValueError(f"Streaming not supported for provider: {self.provider}")
+
+        response = await self._storyteller_model().generate_content_async(
+            self._build_prompt(story_prompt),
+            generation_config=STORY_GENERATION_CONFIG,
+            stream=True
+        )
+
+        async for chunk in response:
+            # Chunks without text (e.g. a final safety/finish chunk) raise on .text
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
+    def _story_result(self, story_text: str, story_prompt: StoryPrompt, prompt: str) -> Dict:
+        """Build the generate_story result dictionary"""
+        return {
+            "story": story_text.strip(),
+            "metadata": {
+                "provider": self.provider,
+                "model": self.model,
+                "prompt_config": story_prompt.to_dict(),
+                "prompt_used": prompt
+            }
+        }
+
+    def _storyteller_model(self):
+        """Gemini model used for story generation"""
+        return self.gemini_model(
+            "You are a creative storyteller who crafts engaging narratives.",
+            SAFETY_SETTINGS
+        )
     
     def _generate_gemini(self, prompt: str) -> str:
         """Generate story using Google Gemini API"""
-        import google.generativeai as genai
-        
-        # Configure safety settings to be less restrictive
-        safety_settings = [
-            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-        ]
-        
-        model = self._client.GenerativeModel(
-            model_name=self.model,
-            system_instruction="You are a creative storyteller who crafts engaging narratives.",
-            safety_settings=safety_settings
-        )
+        model = self._storyteller_model()
         response = model.generate_content(
             prompt,
-            generation_config={
-                "temperature": 0.8,
-                "max_output_tokens": 3000,
-            }
+            generation_config=STORY_GENERATION_CONFIG
         )
         
         # Handle blocked content
@@ -207,13 +311,29 @@ Generate the story now using ONLY simple words and short sentences:"""
             logger.warning("Content filtered, retrying with adjusted settings...")
             response = model.generate_content(
                 prompt,
-                generation_config={
-                    "temperature": 0.5,
-                    "max_output_tokens": 3000,
-                }
+                generation_config=RETRY_GENERATION_CONFIG
             )
         
         return response.text
+
+    async def _generate_gemini_async(self, prompt: str) -> str:
+        """Generate story using Google Gemini API (async client)"""
+        model = self._storyteller_model()
+        response = await model.generate_content_async(
+            prompt,
+            generation_config=STORY_GENERATION_CONFIG
+        )
+
+        # Handle blocked content
+        if not response.candidates or response.candidates[0].finish_reason != 1:
+            # Try with lower temperature
+            logger.warning("Content filtered, retrying with adjusted settings...")
+            response = await model.generate_content_async(
+                prompt,
+                generation_config=RETRY_GENERATION_CONFIG
+            )
+
+        return response.text
     
     def _generate_openai(self, prompt: str) -> str:
         """Generate story using OpenAI API"""
@@ -279,6 +399,44 @@ Generate the story now using ONLY simple words and short sentences:"""
         )
         return self.generate_story(prompt)
 
+    async def generate_from_simple_prompt_async(
+        self,
+        theme: str,
+        style: str = "adventure",
+        tone: str = "engaging",
+        length: str = "medium"
+    ) -> Dict:
+        """Async variant of generate_from_simple_prompt (see generate_story_async)"""
+        prompt = StoryPrompt(
+            theme=theme,
+            style=style,
+            tone=tone,
+            length=length
+        )
+        return await self.generate_story_async(prompt)
+
+
+# Default (Gemini) generator shared by the API routes, created on first use
+# (the API warms it at startup)
+_default_generator: Optional[StoryGenerator] = None
+_default_generator_lock = threading.Lock()
+
+
+def get_story_generator() -> StoryGenerator:
+    """
+    Get the process-wide default StoryGenerator
+
+    Sharing one instance means the client is configured once and each
+    GenerativeModel (one per system instruction) is built once per process,
+    rather than once per route module. Safe to call from several threads.
+    """
+    global _default_generator
+    if _default_generator is None:
+        with _default_generator_lock:
+            if _default_generator is None:
+                _default_generator = StoryGenerator()
+    return _default_generator
+
 
 # Example usage
 if __name__ == "__main__":